@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+from .config import get_settings
+
+settings = get_settings()
+
+
+class AdmissionController:
+    """
+    Limits how much expensive work runs at once.
+
+    Work is admitted while fewer than `max_concurrent` tasks run and their
+    combined cost stays within the pixel and byte budgets; a single task
+    larger than the budget is still admitted when nothing else runs. Other
+    tasks wait in a bounded first-in, first-out queue, so large tasks are not
+    starved by small ones. Tasks are rejected with 503 and Retry-After when
+    the queue is full or their wait times out.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_pixels: int,
+        max_bytes: int,
+        max_waiting: int,
+        wait_timeout: float,
+        retry_after: int,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+
+        self.running = 0
+        self.pixels = 0
+        self.bytes = 0
+        self._waiters = deque()
+
+        self.admitted_total = 0
+        self.rejected_queue_full_total = 0
+        self.rejected_timeout_total = 0
+        self.wait_seconds_total = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _fits(self, pixels: int, nbytes: int) -> bool:
+        if self.running >= self.max_concurrent:
+            return False
+        if self.running == 0:
+            return True
+        return (
+            self.pixels + pixels <= self.max_pixels
+            and self.bytes + nbytes <= self.max_bytes
+        )
+
+    def _grant(self, pixels: int, nbytes: int):
+        self.running += 1
+        self.pixels += pixels
+        self.bytes += nbytes
+        self.admitted_total += 1
+
+    def _release(self, pixels: int, nbytes: int):
+        self.running -= 1
+        self.pixels -= pixels
+        self.bytes -= nbytes
+        self._wake()
+
+    def _wake(self):
+        """Admits waiting tasks in order, as long as the head of the queue fits."""
+        while self._waiters:
+            future, pixels, nbytes = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(pixels, nbytes):
+                return
+            self._waiters.popleft()
+            self._grant(pixels, nbytes)
+            future.set_result(None)
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The server is busy processing other uploads. Please try again shortly.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def _acquire(self, pixels: int, nbytes: int):
+        if not self._waiters and self._fits(pixels, nbytes):
+            self._grant(pixels, nbytes)
+            return
+
+        if len(self._waiters) >= self.max_waiting:
+            self.rejected_queue_full_total += 1
+            raise self._unavailable()
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, pixels, nbytes)
+        self._waiters.append(waiter)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.wait_timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait ended; hand the slot on
+                self._release(pixels, nbytes)
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                # The removed waiter may have blocked smaller ones behind it
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_timeout_total += 1
+                raise self._unavailable()
+            raise
+        finally:
+            self.wait_seconds_total += time.monotonic() - start
+
+    @asynccontextmanager
+    async def admit(self, pixels: int = 0, nbytes: int = 0):
+        """
+        Waits until the task may run and holds its share of the budget meanwhile.
+
+        Args:
+            pixels: Number of pixels the task decodes.
+            nbytes: Number of bytes the task holds in memory.
+
+        Raises:
+            HTTPException: 503 with Retry-After if the queue is full or the wait times out.
+        """
+        await self._acquire(pixels, nbytes)
+        try:
+            yield
+        finally:
+            self._release(pixels, nbytes)
+
+    def metrics(self) -> dict:
+        """Returns the current state and counters, e.g. for the metrics endpoint."""
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "pixels_in_flight": self.pixels,
+            "bytes_in_flight": self.bytes,
+            "admitted_total": self.admitted_total,
+            "rejected_queue_full_total": self.rejected_queue_full_total,
+            "rejected_timeout_total": self.rejected_timeout_total,
+            "wait_seconds_total": self.wait_seconds_total,
+        }
+
+
+# Shared by all uploads handled by this process
+upload_admission = AdmissionController(
+    max_concurrent=settings.UPLOAD_MAX_CONCURRENT,
+    max_pixels=settings.UPLOAD_MAX_PIXELS_IN_FLIGHT,
+    max_bytes=settings.UPLOAD_MAX_BYTES_IN_FLIGHT,
+    max_waiting=settings.UPLOAD_MAX_WAITING,
+    wait_timeout=settings.UPLOAD_WAIT_TIMEOUT_SECONDS,
+    retry_after=settings.UPLOAD_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Session, delete, select, update
+
+from .models import ArchiveMonth, Image
+
+
+def month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    """
+    Returns the half-open range of upload dates belonging to a month.
+
+    Args:
+        year: The year of the month.
+        month: The month, from 1 to 12.
+
+    Returns:
+        The first moment of the month and the first moment of the following month.
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def _newest_image_id(
+    session: Session, year: int, month: int, exclude_id: Optional[int] = None
+) -> Optional[int]:
+    """Finds the newest image of a month with an indexed range scan."""
+    start, end = month_range(year, month)
+    query = (
+        select(Image.id)
+        .where(Image.upload_date >= start)
+        .where(Image.upload_date < end)
+        .order_by(Image.upload_date.desc())
+        .limit(1)
+    )
+    if exclude_id is not None:
+        query = query.where(Image.id != exclude_id)
+    return session.exec(query).first()
+
+
+def record_upload(session: Session, image: Image):
+    """
+    Adds a newly stored image to the monthly rollup.
+
+    The caller commits, so the rollup changes together with the image row.
+
+    Args:
+        session: Database session to execute the query.
+        image: The stored image; it is flushed to obtain its ID if necessary.
+    """
+    if image.id is None:
+        session.flush()
+
+    year, month = image.upload_date.year, image.upload_date.month
+    result = session.exec(
+        update(ArchiveMonth)
+        .where(ArchiveMonth.year == year)
+        .where(ArchiveMonth.month == month)
+        .values(image_count=ArchiveMonth.image_count + 1)
+    )
+
+    if result.rowcount == 0:
+        session.add(
+            ArchiveMonth(year=year, month=month, image_count=1, cover_image_id=image.id)
+        )
+        return
+
+    # Uploads are almost always the newest image of their month
+    archive_month = session.get(ArchiveMonth, (year, month))
+    session.refresh(archive_month)
+    cover = (
+        session.get(Image, archive_month.cover_image_id)
+        if archive_month.cover_image_id
+        else None
+    )
+    if cover is None or image.upload_date >= cover.upload_date:
+        archive_month.cover_image_id = image.id
+        session.add(archive_month)
+
+
+def record_delete(session: Session, image: Image):
+    """
+    Removes an image from the monthly rollup, picking a new cover if needed.
+
+    The caller deletes the image and commits.
+
+    Args:
+        session: Database session to execute the query.
+        image: The image about to be deleted.
+    """
+    year, month = image.upload_date.year, image.upload_date.month
+    archive_month = session.get(ArchiveMonth, (year, month))
+    if archive_month is None:
+        return
+
+    if archive_month.image_count <= 1:
+        session.delete(archive_month)
+        return
+
+    archive_month.image_count -= 1
+    if archive_month.cover_image_id == image.id:
+        archive_month.cover_image_id = _newest_image_id(
+            session, year, month, exclude_id=image.id
+        )
+    session.add(archive_month)
+
+
+def rebuild_archive(session: Session) -> int:
+    """
+    Recomputes the monthly rollup from the image table in a single pass.
+
+    Args:
+        session: Database session to execute the query.
+
+    Returns:
+        The number of months in the rebuilt rollup.
+    """
+    session.exec(delete(ArchiveMonth))
+
+    months = {}
+    rows = session.exec(select(Image.id, Image.upload_date).order_by(Image.upload_date))
+    for image_id, upload_date in rows:
+        key = (upload_date.year, upload_date.month)
+        archive_month = months.get(key)
+        if archive_month is None:
+            archive_month = months[key] = ArchiveMonth(
+                year=key[0], month=key[1], image_count=0
+            )
+        archive_month.image_count += 1
+        # Rows are ordered by date, so the last one seen is the newest
+        archive_month.cover_image_id = image_id
+
+    session.add_all(months.values())
+    session.commit()
+    return len(months)
+
+
+def ensure_archive(session: Session):
+    """
+    Builds the monthly rollup if it is empty while images exist, e.g. for
+    databases created before the archive was introduced.
+
+    Args:
+        session: Database session to execute the query.
+    """
+    has_months = session.exec(select(ArchiveMonth.year).limit(1)).first()
+    has_images = session.exec(select(Image.id).limit(1)).first()
+    if has_months is None and has_images is not None:
+        rebuild_archive(session)
+
+
+def clear_archive(session: Session):
+    """
+    Empties the monthly rollup, e.g. after all images were deleted.
+
+    The caller commits.
+
+    Args:
+        session: Database session to execute the query.
+    """
+    session.exec(delete(ArchiveMonth))
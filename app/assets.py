@@ -0,0 +1,170 @@
+import hashlib
+import json
+import mimetypes
+import shutil
+import stat
+from functools import lru_cache
+from pathlib import Path
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .compression import compress_bytes, negotiate_encoding, supported_encodings
+from .config import get_settings
+
+settings = get_settings()
+
+MANIFEST_NAME = "manifest.json"
+SOURCE_FOLDER = Path("static")
+# Asset types worth pre-compressing; images are already compressed
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".webmanifest", ".ico", ".json"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+def static_root() -> Path:
+    """Returns the built assets if available, otherwise the source assets."""
+    build_folder = Path(settings.STATIC_BUILD_FOLDER)
+    if (build_folder / MANIFEST_NAME).exists():
+        return build_folder
+    return SOURCE_FOLDER.resolve()
+
+
+@lru_cache()
+def load_manifest() -> dict:
+    """Loads the mapping of asset paths to fingerprinted paths, if assets were built."""
+    try:
+        return json.loads(
+            (Path(settings.STATIC_BUILD_FOLDER) / MANIFEST_NAME).read_text()
+        )
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+@lru_cache()
+def fingerprinted_paths() -> frozenset:
+    """Returns the fingerprinted asset paths, which are safe to cache forever."""
+    return frozenset(load_manifest().values())
+
+
+def asset_url(path: str) -> str:
+    """
+    Returns the URL of a static asset, fingerprinted when assets were built.
+
+    Args:
+        path: The path of the asset relative to the static folder.
+
+    Returns:
+        The URL to reference the asset with.
+    """
+    return f"/static/{load_manifest().get(path, path)}"
+
+
+def build_assets(source: Path = SOURCE_FOLDER, target: Path = None) -> dict:
+    """
+    Builds the static assets for production.
+
+    Every asset is copied under its own name and under a fingerprinted name
+    containing a hash of its content, and compressible assets get `.gz` and
+    `.br` variants next to them.
+
+    Args:
+        source: The folder with the source assets.
+        target: The folder to build into; defaults to STATIC_BUILD_FOLDER.
+
+    Returns:
+        The manifest mapping asset paths to fingerprinted paths.
+    """
+    target = Path(target or settings.STATIC_BUILD_FOLDER)
+    if target.exists():
+        shutil.rmtree(target)
+    target.mkdir(parents=True)
+
+    manifest = {}
+    for source_path in sorted(source.rglob("*")):
+        if not source_path.is_file():
+            continue
+
+        relative_path = source_path.relative_to(source)
+        data = source_path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        fingerprinted_path = relative_path.with_name(
+            f"{relative_path.stem}.{digest}{relative_path.suffix}"
+        )
+        manifest[relative_path.as_posix()] = fingerprinted_path.as_posix()
+
+        for output_path in (relative_path, fingerprinted_path):
+            destination = target / output_path
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            destination.write_bytes(data)
+            if relative_path.suffix in COMPRESSIBLE_SUFFIXES:
+                for encoding in supported_encodings():
+                    compressed = compress_bytes(data, encoding)
+                    if len(compressed) < len(data):
+                        suffix = ENCODING_SUFFIXES[encoding]
+                        destination.with_name(destination.name + suffix).write_bytes(
+                            compressed
+                        )
+
+    (target / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    load_manifest.cache_clear()
+    fingerprinted_paths.cache_clear()
+    return manifest
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files serving pre-compressed variants built by `build_assets`
+    when the client accepts them. Fingerprinted assets are cached forever.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        response.headers["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL
+            if path in fingerprinted_paths()
+            else DEFAULT_CACHE_CONTROL
+        )
+        if Path(path).suffix in COMPRESSIBLE_SUFFIXES:
+            response.headers.setdefault("Vary", "Accept-Encoding")
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope):
+        """Returns a pre-compressed variant of the asset, if one exists and is accepted."""
+        if Path(path).suffix not in COMPRESSIBLE_SUFFIXES:
+            return None
+
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding", "")
+        for encoding in supported_encodings():
+            if negotiate_encoding(accept_encoding, available=(encoding,)) is None:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + ENCODING_SUFFIXES[encoding]
+            )
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                break
+        else:
+            return None
+
+        media_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            media_type=media_type or "application/octet-stream",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
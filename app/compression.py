@@ -0,0 +1,99 @@
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is used without it
+    brotli = None
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Content encodings this server can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(
+    accept_encoding: str, available: Optional[tuple[str, ...]] = None
+) -> Optional[str]:
+    """
+    Picks the preferred content encoding accepted by the client.
+
+    Args:
+        accept_encoding: The value of the request's Accept-Encoding header.
+        available: Encodings to choose from, in order of preference.
+
+    Returns:
+        The chosen encoding, or None if the response should not be encoded.
+    """
+    available = available or supported_encodings()
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class Compressor:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str, gzip_level: int = 6, brotli_quality: int = 4):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 produces a gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """
+        Compresses a chunk of the body.
+
+        Args:
+            data: The chunk to compress.
+            flush: Emit everything compressed so far, so a streamed chunk
+                reaches the client without waiting for the next one.
+
+        Returns:
+            The compressed bytes available so far.
+        """
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + self._brotli.flush() if flush else output
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+    def finish(self) -> bytes:
+        """Returns the remaining compressed bytes and ends the stream."""
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compresses a complete payload, e.g. a static asset at build time.
+
+    Args:
+        data: The payload.
+        encoding: Either "br" or "gzip".
+        level: Brotli quality or gzip level; defaults to the maximum.
+
+    Returns:
+        The compressed payload.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if level is None else level)
+    compressor = zlib.compressobj(9 if level is None else level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
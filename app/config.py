@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -16,21 +17,91 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     COOKIE_NAME: str = "access_token"
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are rehashed on login when changed
+
+    # Login admission control
+    LOGIN_MAX_WORKERS: int = 2  # Threads verifying passwords concurrently
+    LOGIN_MAX_PENDING: int = 8  # Running and queued verifications before rejecting
+    LOGIN_RETRY_AFTER_SECONDS: int = 5
 
     # Image and Upload settings
     IMAGES_PER_PAGE: int = 10
+    API_MAX_PAGE_SIZE: int = 100  # Largest page or batch the JSON API returns
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10 MB
     MAX_DIMENSION: int = 1600
     MAX_UPLOADS_PER_DAY: int = 1
     TIMEZONE: str = "Europe/Berlin"
     UPLOAD_FOLDER: Path = BASE_DIR / "uploads"
 
+    # JPEG encoding settings
+    JPEG_QUALITY_MODE: str = "fixed"  # "fixed" or "ssim" (needs the ssim extra)
+    JPEG_QUALITY: int = 90  # Quality in fixed mode
+    JPEG_SSIM_TARGET: float = 0.985  # Luma SSIM the chosen quality must reach
+    JPEG_MIN_QUALITY: int = 60
+    JPEG_MAX_QUALITY: int = 100  # Lower it to cap the size of grainy images
+    JPEG_SSIM_TILES: int = 4  # Tiles per side the quality search samples
+    JPEG_SSIM_TILE_SIZE: int = 128  # Pixels per tile side, a multiple of 16
+    JPEG_SUBSAMPLING: str = "4:2:0"  # Chroma subsampling: "4:4:4", "4:2:2" or "4:2:0"
+    JPEG_OPTIMIZE: bool = True  # Optimized Huffman tables (always used if progressive)
+    JPEG_PROGRESSIVE: bool = True
+
+    # Upload admission control
+    UPLOAD_MAX_CONCURRENT: int = 2  # Images processed at the same time
+    UPLOAD_MAX_PIXELS_IN_FLIGHT: int = 64_000_000  # Decoded pixels of running uploads
+    UPLOAD_MAX_BYTES_IN_FLIGHT: int = 32 * 1024 * 1024  # File bytes of running uploads
+    UPLOAD_MAX_WAITING: int = 8  # Queued uploads before rejecting
+    UPLOAD_WAIT_TIMEOUT_SECONDS: float = 30.0
+    UPLOAD_RETRY_AFTER_SECONDS: int = 10
+
+    # Metrics
+    METRICS_ENABLED: bool = False  # Expose load-shedding state at /metrics
+
+    # Template settings
+    TEMPLATE_CACHE_FOLDER: Path = BASE_DIR / "data" / "template_cache"
+    TEMPLATE_STREAM_BUFFER_SIZE: int = 5  # Rendered chunks per streamed write
+
+    # Response compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 500  # Bytes; smaller responses are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # Used when the brotli package is installed
+    STATIC_BUILD_FOLDER: Path = BASE_DIR / "build" / "static"
+
+    # Image storage settings
+    STORAGE_BACKEND: str = "local"  # "local" (UPLOAD_FOLDER) or "s3"
+    STORAGE_STREAM_CHUNK_SIZE: int = 64 * 1024  # 64 KB
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""  # Key prefix, e.g. "images/"
+    S3_ENDPOINT_URL: Optional[str] = None  # For S3-compatible stores, e.g. MinIO
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None  # Defaults to the boto3 credential chain
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_MAX_POOL_CONNECTIONS: int = 20
+    S3_PRESIGNED_URLS: bool = False  # Redirect image requests to the bucket
+    S3_PRESIGNED_URL_EXPIRES: int = 60 * 60
+
+    # Consistency check (cli.py fsck) settings
+    FSCK_CHUNK_SIZE: int = 1000  # Image rows loaded and verified per batch
+    FSCK_ORPHAN_GRACE_SECONDS: int = 60 * 60  # Younger files may be uploads in progress
+    FSCK_CHECKPOINT_PATH: Path = BASE_DIR / "data" / "fsck_checkpoint.json"
+    FSCK_QUARANTINE_FOLDER: Path = BASE_DIR / "data" / "quarantine"
+
+    # Resumable upload settings
+    UPLOAD_SESSION_FOLDER: Path = BASE_DIR / "data" / "upload_sessions"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MB
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 60 * 60
+    UPLOAD_SESSION_GC_INTERVAL_SECONDS: int = 15 * 60
+
     class Config:
         env_file = ".env"  # Load environment variables from .env, if present
 
     def setup_directories(self):
         """Ensures that required directories exist."""
-        directories = [self.UPLOAD_FOLDER, self.BASE_DIR / "data"]
+        directories = [
+            self.UPLOAD_FOLDER,
+            self.BASE_DIR / "data",
+            self.UPLOAD_SESSION_FOLDER,
+            self.TEMPLATE_CACHE_FOLDER,
+        ]
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
             os.chmod(directory, 0o750)  # Secure permissions
@@ -38,7 +109,10 @@ class Settings(BaseSettings):
 
 @lru_cache()
 def get_settings() -> Settings:
-    """Cached instance of settings."""
-    settings = Settings()
-    settings.setup_directories()
-    return settings
+    """
+    Cached instance of settings.
+
+    Creating the settings has no side effects; required directories are created
+    by `setup_directories` once the app or a CLI command actually needs them.
+    """
+    return Settings()
@@ -1,9 +1,21 @@
+from functools import lru_cache
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine, Session
 from .config import get_settings
 
-# Load settings and configure the database engine
-settings = get_settings()
-engine = create_engine(settings.DATABASE_URL)
+
+@lru_cache()
+def get_engine() -> Engine:
+    """
+    Lazily creates the database engine on first use.
+
+    Returns:
+        engine (Engine): The SQLAlchemy engine for the configured database.
+    """
+    settings = get_settings()
+    settings.setup_directories()
+    return create_engine(settings.DATABASE_URL)
 
 
 def get_session():
@@ -13,7 +25,7 @@ def get_session():
     Yields:
         session (Session): A SQLModel session connected to the database.
     """
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
 
@@ -24,4 +36,31 @@ def init_db():
     This function should be called at application startup to ensure all tables
     are created in the database if they do not already exist.
     """
+    # Register the table models, which callers may not have imported yet
+    from . import models  # noqa: F401
+    from .archive import ensure_archive
+
+    engine = get_engine()
     SQLModel.metadata.create_all(engine)
+
+    # create_all skips existing tables, so add columns and indexes introduced later
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(engine.dialect)
+                    connection.execute(
+                        text(
+                            f'ALTER TABLE "{table.name}" '
+                            f'ADD COLUMN "{column.name}" {column_type}'
+                        )
+                    )
+
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+    with Session(engine) as session:
+        ensure_archive(session)
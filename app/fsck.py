@@ -0,0 +1,231 @@
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlmodel import Session, select
+
+from .archive import record_delete
+from .config import get_settings
+from .models import Image
+from .storage import Storage, get_storage
+
+settings = get_settings()
+
+
+@dataclass
+class FsckReport:
+    """What a consistency check found, and what it changed."""
+
+    images_checked: int = 0
+    files_scanned: int = 0
+    files_verified: int = 0
+    orphans: list[str] = field(default_factory=list)
+    dangling: list[str] = field(default_factory=list)
+    corrupt: list[tuple[str, str]] = field(default_factory=list)
+    quarantined: int = 0
+    rows_deleted: int = 0
+    verified_through_id: int = 0
+
+
+def iter_image_rows(session: Session, chunk_size: int) -> Iterator[list]:
+    """
+    Yields the id and filename of all images in chunks, ordered by id.
+
+    Uses keyset pagination, so each chunk is an indexed range scan and memory
+    use does not grow with the size of the table.
+    """
+    last_id = 0
+    while True:
+        rows = session.exec(
+            select(Image.id, Image.filename)
+            .where(Image.id > last_id)
+            .order_by(Image.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def verify_image(name: str) -> Optional[str]:
+    """
+    Decodes a stored image completely. Runs in a worker process.
+
+    Returns:
+        A description of the problem, or None if the image is intact.
+    """
+    from PIL import Image as PILImage
+
+    storage = get_storage()
+    try:
+        path = storage.path(name)
+        data = path.read_bytes() if path is not None else storage.get(name)
+        with PILImage.open(io.BytesIO(data)) as img:
+            if img.format != "JPEG":
+                return f"not a JPEG but {img.format}"
+            img.verify()
+        # verify() only checks the structure; decoding finds truncated data
+        with PILImage.open(io.BytesIO(data)) as img:
+            img.load()
+    except FileNotFoundError:
+        # Deleted since the scan; the next run reports it if its row remains
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def load_checkpoint(path: Path) -> dict:
+    """Loads the verification checkpoint, or an empty one."""
+    try:
+        checkpoint = json.loads(Path(path).read_text())
+    except (FileNotFoundError, ValueError):
+        checkpoint = {}
+    return {
+        "verified_through_id": checkpoint.get("verified_through_id", 0),
+        "corrupt": checkpoint.get("corrupt", {}),
+    }
+
+
+def save_checkpoint(path: Path, checkpoint: dict):
+    """Writes the verification checkpoint atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+
+def _quarantine(storage: Storage, name: str, folder: Path):
+    """Moves a stored file into the quarantine folder."""
+    folder.mkdir(parents=True, exist_ok=True)
+    target = folder / name
+    if target.exists():
+        target = folder / f"{name}.{int(time.time())}"
+
+    path = storage.path(name)
+    if path is not None:
+        shutil.move(path, target)
+    else:
+        target.write_bytes(storage.get(name))
+        storage.delete(name)
+
+
+def _verify(
+    report: FsckReport, candidates: list, checkpoint: dict, workers: Optional[int]
+):
+    """
+    Verifies images in id order, saving the checkpoint after each chunk.
+
+    Workers are spawned rather than forked: a forked worker would inherit the
+    parent's cached storage client, and boto3 clients and their pooled
+    connections must not be shared across processes.
+    """
+    chunk_size = settings.FSCK_CHUNK_SIZE
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start : start + chunk_size]
+            names = [name for _, name in chunk]
+            for name, error in zip(names, pool.map(verify_image, names, chunksize=16)):
+                if error:
+                    checkpoint["corrupt"][name] = error
+            report.files_verified += len(chunk)
+            checkpoint["verified_through_id"] = chunk[-1][0]
+            save_checkpoint(settings.FSCK_CHECKPOINT_PATH, checkpoint)
+
+
+def check_consistency(
+    session: Session,
+    verify: bool = False,
+    workers: Optional[int] = None,
+    quarantine: bool = False,
+    repair: bool = False,
+    full: bool = False,
+) -> FsckReport:
+    """
+    Reconciles the stored image files with the image table.
+
+    Finds orphan files without a row and dangling rows without a file, and
+    optionally decodes every image to find corrupt files. Verification is
+    incremental: images up to the checkpointed id were verified by an earlier
+    run and are skipped, and corrupt files found earlier are reported until
+    they are repaired.
+
+    Args:
+        session: Database session to execute the query.
+        verify: Decode images on a process pool to find corrupt files.
+        workers: Number of verifying processes; defaults to the CPU count.
+        quarantine: Move orphan and corrupt files to the quarantine folder.
+        repair: Delete rows whose file is missing or corrupt.
+        full: Verify all images, ignoring the checkpoint.
+
+    Returns:
+        FsckReport: What was found and changed.
+    """
+    storage = get_storage()
+    report = FsckReport()
+
+    # Rows are read before files are listed: files are stored before their
+    # row is committed, so a row read here has its file in the listing
+    # unless the file is really missing
+    rows = {}
+    for chunk in iter_image_rows(session, settings.FSCK_CHUNK_SIZE):
+        rows.update((row.filename, row.id) for row in chunk)
+    report.images_checked = len(rows)
+
+    files = dict(storage.scan())
+    report.files_scanned = len(files)
+
+    # Recent files without a row may belong to uploads still in progress
+    cutoff = time.time() - settings.FSCK_ORPHAN_GRACE_SECONDS
+    report.orphans = sorted(
+        name for name in files.keys() - rows.keys() if files[name] < cutoff
+    )
+    report.dangling = sorted(rows.keys() - files.keys())
+
+    checkpoint = load_checkpoint(settings.FSCK_CHECKPOINT_PATH)
+    if verify and full:
+        checkpoint = {"verified_through_id": 0, "corrupt": {}}
+    present = rows.keys() & files.keys()
+    checkpoint["corrupt"] = {
+        name: error for name, error in checkpoint["corrupt"].items() if name in present
+    }
+    if verify:
+        candidates = sorted(
+            (rows[name], name)
+            for name in present
+            if rows[name] > checkpoint["verified_through_id"]
+        )
+        _verify(report, candidates, checkpoint, workers)
+    report.corrupt = sorted(checkpoint["corrupt"].items())
+    report.verified_through_id = checkpoint["verified_through_id"]
+
+    if quarantine:
+        for name in report.orphans + [name for name, _ in report.corrupt]:
+            _quarantine(storage, name, Path(settings.FSCK_QUARANTINE_FOLDER))
+            report.quarantined += 1
+
+    if repair:
+        doomed = [rows[name] for name in report.dangling]
+        doomed += [rows[name] for name, _ in report.corrupt]
+        for start in range(0, len(doomed), settings.FSCK_CHUNK_SIZE):
+            chunk = doomed[start : start + settings.FSCK_CHUNK_SIZE]
+            for image in session.exec(select(Image).where(Image.id.in_(chunk))).all():
+                record_delete(session, image)
+                session.delete(image)
+                report.rows_deleted += 1
+            session.commit()
+        checkpoint["corrupt"] = {}
+
+    save_checkpoint(settings.FSCK_CHECKPOINT_PATH, checkpoint)
+    return report
@@ -1,36 +1,137 @@
-from pathlib import Path
+import asyncio
 import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from uuid import uuid4
-from PIL import Image as PILImage, UnidentifiedImageError, ExifTags
 from fastapi import HTTPException, UploadFile
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+from .admission import upload_admission
 from .config import get_settings
+from .jpeg_encoding import encode_jpeg
+from .models import Image
+from .storage import get_storage
 
 settings = get_settings()
 
+# Content types accepted for uploads
+ALLOWED_CONTENT_TYPES = [
+    "image/jpeg",
+    "image/jpg",
+    "image/png",
+    "image/tiff",
+]
+
+
+@lru_cache()
+def get_image_executor() -> ThreadPoolExecutor:
+    """
+    Lazily creates the thread pool for image processing.
+
+    A dedicated pool keeps decoding off the event loop without taking threads
+    from the shared pool that serves the feed.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.UPLOAD_MAX_CONCURRENT, thread_name_prefix="image"
+    )
+
+
+def _file_size(file) -> int:
+    """Returns the size of a file object without reading it."""
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+@dataclass
+class StoredImage:
+    """A processed image written to storage."""
+
+    filename: str
+    width: int
+    height: int
+
+
+def _encode_image(image_data: bytes) -> tuple[bytes, tuple[int, int]]:
+    """
+    Applies the EXIF orientation, limits the dimensions and encodes the image
+    as a JPEG without metadata, with the quality chosen by JPEG_QUALITY_MODE.
+
+    Args:
+        image_data: The uploaded file's content.
+
+    Returns:
+        tuple: The encoded JPEG and its width and height.
+    """
+    from PIL import Image as PILImage, ExifTags
+
+    # Open the image
+    with PILImage.open(io.BytesIO(image_data)) as img:
+        # Apply EXIF orientation if present
+        try:
+            for orientation in ExifTags.TAGS.keys():
+                if ExifTags.TAGS[orientation] == "Orientation":
+                    break
+            exif = img._getexif()
+            if exif:
+                orientation_value = exif.get(orientation)
+                if orientation_value == 3:
+                    img = img.rotate(180, expand=True)
+                elif orientation_value == 6:
+                    img = img.rotate(270, expand=True)
+                elif orientation_value == 8:
+                    img = img.rotate(90, expand=True)
+        except (AttributeError, KeyError, IndexError):
+            # Skip if there's no EXIF orientation data
+            pass
+
+        # Convert image to RGB if necessary (ensures consistency and JPEG compatibility)
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+
+        # Resize image if it exceeds max dimensions
+        if img.width > settings.MAX_DIMENSION or img.height > settings.MAX_DIMENSION:
+            img.thumbnail((settings.MAX_DIMENSION, settings.MAX_DIMENSION))
+
+        # Copy only the pixels, dropping EXIF data; tobytes/frombytes copy in C
+        # instead of one Python object per pixel, so other requests keep running
+        img_without_exif = PILImage.frombytes(img.mode, img.size, img.tobytes())
+
+    return encode_jpeg(img_without_exif), img_without_exif.size
+
 
 async def process_and_save_image(
     file: UploadFile, user_id: int, content_type: str = None
-) -> str:
+) -> StoredImage:
     """
     Processes and saves an uploaded image file, ensuring it meets size, format, and dimension restrictions.
-    All EXIF metadata is removed from the saved image.
+    All EXIF metadata is removed from the saved image, which is written to the
+    configured storage backend.
+
+    Processing is admitted by the upload admission controller, which limits
+    how many images and pixels are decoded at once.
 
     Args:
         file (UploadFile): The uploaded image file.
         user_id (int): The ID of the user uploading the file.
 
     Returns:
-        str: The filename of the saved image.
+        StoredImage: The filename and dimensions of the saved image.
 
     Raises:
-        HTTPException: If the file is too large, has an unsupported format, or cannot be processed.
+        HTTPException: If the file is too large, has an unsupported format, or cannot be processed,
+            or 503 if the server is too busy to process it.
     """
 
-    # Read file content into memory
-    image_data = await file.read()
+    # Pillow is imported on first use so the feed-serving paths start faster
+    from PIL import Image as PILImage, UnidentifiedImageError
 
-    # Validate file size
-    if len(image_data) > settings.MAX_FILE_SIZE:
+    # Validate file size before reading the file into memory
+    file_size = _file_size(file.file)
+    if file_size > settings.MAX_FILE_SIZE:
         raise HTTPException(
             status_code=400, detail="File too large. Max size is 10 MB."
         )
@@ -39,58 +140,16 @@ async def process_and_save_image(
     actual_content_type = content_type or file.content_type
 
     # Validate file format
-    if actual_content_type not in [
-        "image/jpeg",
-        "image/jpg",
-        "image/png",
-        "image/tiff",
-    ]:
+    if actual_content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(
             status_code=400,
             detail="Unsupported file format. Only JPEG, PNG, and TIFF images are allowed.",
         )
 
-    # Generate a unique filename for storage
-    filename = f"{uuid4().hex}_{user_id}.jpg"  # Save all files as JPEG for consistency
-    filepath = Path(settings.UPLOAD_FOLDER) / filename
-
+    # Read only the header to learn how many pixels decoding will take
     try:
-        # Open the image
-        with PILImage.open(io.BytesIO(image_data)) as img:
-            # Apply EXIF orientation if present
-            try:
-                for orientation in ExifTags.TAGS.keys():
-                    if ExifTags.TAGS[orientation] == "Orientation":
-                        break
-                exif = img._getexif()
-                if exif:
-                    orientation_value = exif.get(orientation)
-                    if orientation_value == 3:
-                        img = img.rotate(180, expand=True)
-                    elif orientation_value == 6:
-                        img = img.rotate(270, expand=True)
-                    elif orientation_value == 8:
-                        img = img.rotate(90, expand=True)
-            except (AttributeError, KeyError, IndexError):
-                # Skip if there's no EXIF orientation data
-                pass
-
-            # Convert image to RGB if necessary (ensures consistency and JPEG compatibility)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-
-            # Resize image if it exceeds max dimensions
-            if (
-                img.width > settings.MAX_DIMENSION
-                or img.height > settings.MAX_DIMENSION
-            ):
-                img.thumbnail((settings.MAX_DIMENSION, settings.MAX_DIMENSION))
-
-            # Save the processed image as JPEG without EXIF data
-            img_without_exif = PILImage.new(img.mode, img.size)
-            img_without_exif.putdata(img.getdata())
-            img_without_exif.save(filepath, format="JPEG", quality=90, progressive=True)
-
+        with PILImage.open(file.file) as img:
+            pixels = img.width * img.height
     except UnidentifiedImageError:
         raise HTTPException(
             status_code=400,
@@ -100,5 +159,88 @@ async def process_and_save_image(
         raise HTTPException(
             status_code=500, detail="An error occurred while processing the image."
         )
+    file.file.seek(0)
+
+    # Generate a unique filename for storage
+    filename = f"{uuid4().hex}_{user_id}.jpg"  # Save all files as JPEG for consistency
+
+    async with upload_admission.admit(pixels=pixels, nbytes=file_size):
+        # Read file content into memory
+        image_data = await file.read()
+
+        try:
+            loop = asyncio.get_running_loop()
+            jpeg_data, (width, height) = await loop.run_in_executor(
+                get_image_executor(), _encode_image, image_data
+            )
+
+            # Object stores are reached over the network, so keep the event loop free
+            await run_in_threadpool(
+                get_storage().put, filename, jpeg_data, "image/jpeg"
+            )
+
+        except UnidentifiedImageError:
+            raise HTTPException(
+                status_code=400,
+                detail="Error processing image. Unsupported or corrupted file.",
+            )
+        except Exception:
+            raise HTTPException(
+                status_code=500, detail="An error occurred while processing the image."
+            )
+
+    return StoredImage(filename=filename, width=width, height=height)
+
+
+def read_dimensions(filename: str) -> tuple[int, int]:
+    """
+    Reads the width and height of a stored image from its header.
 
-    return filename
+    Raises:
+        FileNotFoundError: If the image is not in storage.
+    """
+    from PIL import Image as PILImage
+
+    storage = get_storage()
+    path = storage.path(filename)
+    source = path if path is not None else io.BytesIO(storage.get(filename))
+    with PILImage.open(source) as img:
+        return img.size
+
+
+def backfill_dimensions(session: Session, chunk_size: int = 500) -> tuple[int, int]:
+    """
+    Stores the dimensions of images uploaded before they were recorded.
+
+    Args:
+        session: Database session to execute the query.
+        chunk_size: Number of images updated per transaction.
+
+    Returns:
+        tuple: The number of updated images, and of images whose file could not be read.
+    """
+    from PIL import UnidentifiedImageError
+
+    updated, failed = 0, 0
+    last_id = 0
+    while True:
+        images = session.exec(
+            select(Image)
+            .where(Image.id > last_id)
+            .where(Image.width.is_(None))
+            .order_by(Image.id)
+            .limit(chunk_size)
+        ).all()
+        if not images:
+            return updated, failed
+
+        for image in images:
+            try:
+                image.width, image.height = read_dimensions(image.filename)
+            except (FileNotFoundError, UnidentifiedImageError):
+                failed += 1
+                continue
+            session.add(image)
+            updated += 1
+        session.commit()
+        last_id = images[-1].id
@@ -0,0 +1,229 @@
+import io
+import logging
+from functools import lru_cache
+
+from .config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# SSIM stabilizing constants for 8-bit images
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+SSIM_WINDOW = 8
+
+
+@lru_cache()
+def _numpy():
+    """Imports NumPy, which is only needed by the SSIM quality search."""
+    try:
+        import numpy
+    except ImportError:
+        logger.warning(
+            "JPEG_QUALITY_MODE=ssim requires numpy from the ssim extra; "
+            "encoding at JPEG_QUALITY instead."
+        )
+        return None
+    return numpy
+
+
+def _window_means(values):
+    """
+    Mean of every SSIM window at a stride of half its size, computed from the
+    sums of the blocks the windows are made of.
+    """
+    if min(values.shape) < SSIM_WINDOW:
+        # Too small for a window, so the whole image is compared at once
+        return values.mean(keepdims=True)
+
+    step = SSIM_WINDOW // 2
+    height = values.shape[0] // step * step
+    width = values.shape[1] // step * step
+    blocks = (
+        values[:height, :width]
+        .reshape(height // step, step, width // step, step)
+        .sum(axis=(1, 3))
+    )
+    total = blocks[:-1, :-1] + blocks[1:, :-1] + blocks[:-1, 1:] + blocks[1:, 1:]
+    return total / SSIM_WINDOW**2
+
+
+class SsimReference:
+    """
+    Luma statistics of a reference image, computed once and compared against
+    any number of distorted versions of it.
+
+    Uses the mean structural similarity over 8 × 8 windows at a stride of 4
+    pixels. Half of the windows straddle the edges of JPEG blocks, so blocking
+    is measured, at a sixteenth of the cost of sliding them pixel by pixel.
+    """
+
+    def __init__(self, luma):
+        np = _numpy()
+        self.luma = np.asarray(luma, dtype=np.float64)
+        self.mean = _window_means(self.luma)
+        self.variance = _window_means(self.luma**2) - self.mean**2
+
+    def compare(self, luma) -> float:
+        """
+        Returns the SSIM of a distorted version of the reference.
+
+        Args:
+            luma: The distorted luma channel, with the reference's shape.
+
+        Returns:
+            float: 1.0 for identical images, lower for larger differences.
+        """
+        np = _numpy()
+        luma = np.asarray(luma, dtype=np.float64)
+        mean = _window_means(luma)
+        variance = _window_means(luma**2) - mean**2
+        covariance = _window_means(self.luma * luma) - self.mean * mean
+
+        similarity = ((2 * self.mean * mean + SSIM_C1) * (2 * covariance + SSIM_C2)) / (
+            (self.mean**2 + mean**2 + SSIM_C1) * (self.variance + variance + SSIM_C2)
+        )
+        return float(similarity.mean())
+
+
+def ssim(reference, distorted) -> float:
+    """Returns the SSIM between the luma channels of two images of the same size."""
+    np = _numpy()
+    return SsimReference(np.asarray(reference.convert("L"))).compare(
+        np.asarray(distorted.convert("L"))
+    )
+
+
+def _save_jpeg(img, quality: int, subsampling: str = None, final: bool = True) -> bytes:
+    """
+    Encodes an image as JPEG.
+
+    Optimized Huffman tables and progressive scans change the size but not
+    the decoded pixels, so trial encodings (final=False) skip them.
+    """
+    output = io.BytesIO()
+    img.save(
+        output,
+        format="JPEG",
+        quality=quality,
+        subsampling=subsampling or settings.JPEG_SUBSAMPLING,
+        optimize=final and settings.JPEG_OPTIMIZE,
+        progressive=final and settings.JPEG_PROGRESSIVE,
+    )
+    return output.getvalue()
+
+
+def _tile_offset(index: int, tiles: int, length: int, tile_size: int) -> int:
+    """Start of a tile centered in its share of a side, on a 16-pixel boundary."""
+    center = (2 * index + 1) * length // (2 * tiles)
+    return (center - tile_size // 2) // 16 * 16
+
+
+def _sample_tiles(img, tiles: int, tile_size: int):
+    """
+    Returns a mosaic of tiles × tiles crops spread evenly over the image, at
+    full resolution, or the image itself if it is too small to sample.
+
+    Crops start on multiples of 16 pixels, so they are split into the same
+    JPEG blocks as in the full image.
+    """
+    from PIL import Image as PILImage
+
+    if tiles < 1 or min(img.size) < tiles * tile_size:
+        return img
+
+    mosaic = PILImage.new(img.mode, (tiles * tile_size, tiles * tile_size))
+    for row in range(tiles):
+        top = _tile_offset(row, tiles, img.height, tile_size)
+        for column in range(tiles):
+            left = _tile_offset(column, tiles, img.width, tile_size)
+            tile = img.crop((left, top, left + tile_size, top + tile_size))
+            mosaic.paste(tile, (column * tile_size, row * tile_size))
+    return mosaic
+
+
+def _score(img, reference: SsimReference, quality: int, subsampling: str) -> float:
+    """Returns the SSIM of an image encoded at the given quality."""
+    from PIL import Image as PILImage
+
+    np = _numpy()
+    encoded = _save_jpeg(img, quality, subsampling, final=False)
+    with PILImage.open(io.BytesIO(encoded)) as decoded:
+        return reference.compare(np.asarray(decoded.convert("L")))
+
+
+def _bisect_quality(
+    img, reference: SsimReference, target: float, subsampling: str, low: int, high: int
+) -> int:
+    """Returns the lowest quality from low to high reaching the target, or high."""
+    quality = high
+    while low <= high:
+        candidate = (low + high) // 2
+        if _score(img, reference, candidate, subsampling) >= target:
+            quality = candidate
+            high = candidate - 1
+        else:
+            low = candidate + 1
+    return quality
+
+
+def find_quality(
+    img, target: float = None, subsampling: str = None, tiles: int = None
+) -> int:
+    """
+    Finds the lowest quality whose encoding still reaches the SSIM target.
+
+    Quality is bisected between JPEG_MIN_QUALITY and JPEG_MAX_QUALITY on a
+    mosaic of full-resolution tiles, which keeps the search cheap for large
+    images without hiding grain and fine texture the way a downscaled copy
+    does. The estimate is then checked on the full image; if it falls short,
+    the search continues on the full image above it. Images that do not reach
+    the target get JPEG_MAX_QUALITY.
+
+    Args:
+        img: The image to encode.
+        target: The SSIM to reach; defaults to JPEG_SSIM_TARGET.
+        subsampling: Chroma subsampling; defaults to JPEG_SUBSAMPLING.
+        tiles: Tiles per side of the mosaic, or 0 to search on the full image;
+            defaults to JPEG_SSIM_TILES.
+
+    Returns:
+        int: The JPEG quality to encode the image with.
+    """
+    np = _numpy()
+    target = target or settings.JPEG_SSIM_TARGET
+    tiles = settings.JPEG_SSIM_TILES if tiles is None else tiles
+    low, high = settings.JPEG_MIN_QUALITY, settings.JPEG_MAX_QUALITY
+
+    sample = _sample_tiles(img, tiles, settings.JPEG_SSIM_TILE_SIZE)
+    reference = SsimReference(np.asarray(sample.convert("L")))
+    quality = _bisect_quality(sample, reference, target, subsampling, low, high)
+    if sample is img or quality == high:
+        return quality
+
+    reference = SsimReference(np.asarray(img.convert("L")))
+    if _score(img, reference, quality, subsampling) < target:
+        quality = _bisect_quality(
+            img, reference, target, subsampling, quality + 1, high
+        )
+    return quality
+
+
+def encode_jpeg(img) -> bytes:
+    """
+    Encodes an image as JPEG according to JPEG_QUALITY_MODE.
+
+    In "fixed" mode every image is encoded at JPEG_QUALITY. In "ssim" mode the
+    quality is chosen per image as the lowest one meeting JPEG_SSIM_TARGET, so
+    simple scenes are stored with fewer bytes than detailed ones.
+
+    Args:
+        img: The processed image.
+
+    Returns:
+        bytes: The encoded JPEG.
+    """
+    quality = settings.JPEG_QUALITY
+    if settings.JPEG_QUALITY_MODE == "ssim" and _numpy() is not None:
+        quality = find_quality(img)
+    return _save_jpeg(img, quality)
@@ -1,16 +1,22 @@
-import os
-from pathlib import Path
+import asyncio
 from contextlib import asynccontextmanager
 import logging
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.database import init_db
 from app.config import get_settings
-from app.middleware import AuthRedirectMiddleware, SecurityHeadersMiddleware
-from app.routers import auth, images
+from app.assets import PrecompressedStaticFiles, static_root
+from app.middleware import (
+    AuthRedirectMiddleware,
+    CompressionMiddleware,
+    SecurityHeadersMiddleware,
+)
+from app.routers import api, archive, auth, images, metrics, uploads
+from app.security import prepare_dummy_hash
+from app.uploads import upload_session_gc_loop
+from app.templating import precompile_templates
 
 # Configure the logger
 logger = logging.getLogger(__name__)
@@ -22,10 +28,14 @@ def create_app() -> FastAPI:
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         # Startup actions
+        settings.setup_directories()
         init_db()
-        os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
-        os.chmod(settings.UPLOAD_FOLDER, 0o750)
+        precompile_templates()
+        prepare_dummy_hash()
+        gc_task = asyncio.create_task(upload_session_gc_loop())
         yield
+        # Shutdown actions
+        gc_task.cancel()
 
     app = FastAPI(
         title="Photolog",
@@ -50,15 +60,18 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(CompressionMiddleware)
     app.add_middleware(SecurityHeadersMiddleware)
     app.add_middleware(AuthRedirectMiddleware)
 
-    static_path = Path("static").resolve()
+    static_path = static_root()
     uploads_path = settings.UPLOAD_FOLDER.resolve()
 
     if not uploads_path.is_relative_to(static_path):
         app.mount(
-            "/static", StaticFiles(directory=static_path, html=True), name="static"
+            "/static",
+            PrecompressedStaticFiles(directory=static_path, html=True),
+            name="static",
         )
     else:
         logger.error(
@@ -70,6 +83,11 @@ def create_app() -> FastAPI:
 
     app.include_router(auth.router)
     app.include_router(images.router)
+    app.include_router(uploads.router)
+    app.include_router(archive.router)
+    app.include_router(api.router)
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics.router)
 
     @app.exception_handler(404)
     async def custom_404_handler(_, __):
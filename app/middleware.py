@@ -1,6 +1,24 @@
+from functools import lru_cache
+
 from fastapi import Request
 from fastapi.responses import RedirectResponse
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .compression import Compressor, negotiate_encoding
+from .config import get_settings
+from .storage import get_storage
+
+# Response types worth compressing on the fly
+COMPRESSIBLE_TYPES = {"text/html", "application/json"}
+
+
+@lru_cache()
+def _image_sources() -> str:
+    """Returns the CSP image sources, including the storage's origin for redirects."""
+    origin = get_storage().url_origin()
+    return f"'self' data: {origin}" if origin else "'self' data:"
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -22,10 +40,10 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         )
         response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
 
-        # Content Security Policy (CSP)
+        # Content Security Policy (CSP); images may redirect to the object store
         response.headers["Content-Security-Policy"] = (
             "default-src 'self'; "
-            "img-src 'self' data:; "
+            f"img-src {_image_sources()}; "
             "script-src 'self' 'unsafe-inline' https://unpkg.com; "
             "style-src 'self' 'unsafe-inline'; "
             "connect-src 'self'; "
@@ -50,3 +68,92 @@ class AuthRedirectMiddleware(BaseHTTPMiddleware):
             return RedirectResponse(url="/login")
 
         return response
+
+
+class CompressionMiddleware:
+    """
+    Middleware compressing HTML and JSON responses with brotli or gzip,
+    depending on what the client accepts.
+
+    Complete responses are only compressed above a minimum size. Streamed
+    responses are compressed chunk by chunk and flushed after every chunk, so
+    early parts of a page still reach the client early.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        settings = get_settings()
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor
+
+            if message["type"] == "http.response.start":
+                # Hold the start until the first body chunk decides the encoding
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "").split(";")[0]
+                compressible = (
+                    content_type in COMPRESSIBLE_TYPES
+                    and "content-encoding" not in headers
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+                if not compressible:
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+
+                compressor = Compressor(
+                    encoding,
+                    gzip_level=self.gzip_level,
+                    brotli_quality=self.brotli_quality,
+                )
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                if not more_body:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["Content-Length"]
+                await send(start_message)
+
+            if more_body:
+                body = compressor.compress(body, flush=True)
+            else:
+                body = compressor.compress(body) + compressor.finish()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
@@ -31,13 +31,63 @@ class Image(SQLModel, table=True):
         original_filename (str): Original filename of the uploaded image.
         upload_date (datetime): Timestamp of when the image was uploaded.
         user_id (int): Foreign key referencing the user who uploaded the image.
+        width (int): Width of the stored image in pixels, if known.
+        height (int): Height of the stored image in pixels, if known.
     """
 
     id: Optional[int] = Field(default=None, primary_key=True)
     filename: str = Field(nullable=False)
     original_filename: str = Field(nullable=False)
-    upload_date: datetime = Field(default_factory=datetime.utcnow)
+    upload_date: datetime = Field(default_factory=datetime.utcnow, index=True)
     user_id: int = Field(foreign_key="user.id", nullable=False)
+    width: Optional[int] = Field(default=None, index=True)
+    height: Optional[int] = Field(default=None)
 
     # Relationship to the User model
     user: "User" = Relationship(back_populates="images")
+
+
+class ArchiveMonth(SQLModel, table=True):
+    """
+    Rollup of the images uploaded in one calendar month (UTC).
+
+    Maintained incrementally whenever an image is stored or deleted, so the
+    archive index never has to scan the image table.
+
+    Attributes:
+        year (int): The year of the month.
+        month (int): The month, from 1 to 12.
+        image_count (int): Number of images uploaded in the month.
+        cover_image_id (int): ID of the newest image of the month.
+    """
+
+    year: int = Field(primary_key=True)
+    month: int = Field(primary_key=True)
+    image_count: int = Field(default=0, nullable=False)
+    cover_image_id: Optional[int] = Field(default=None, foreign_key="image.id")
+
+
+class UploadSession(SQLModel, table=True):
+    """
+    Represents a resumable upload that is still in progress.
+
+    The uploaded bytes are appended to a temporary file on disk; the current
+    offset is the size of that file, so it survives worker restarts.
+
+    Attributes:
+        id (str): Random identifier of the upload session.
+        user_id (int): Foreign key referencing the user who started the upload.
+        original_filename (str): Original filename of the uploaded image.
+        content_type (str): Declared content type of the uploaded image.
+        total_size (int): Declared size of the complete file in bytes.
+        created_at (datetime): Timestamp of when the session was created.
+        updated_at (datetime): Timestamp of the last received chunk.
+    """
+
+    id: str = Field(primary_key=True)
+    user_id: int = Field(foreign_key="user.id", nullable=False)
+    original_filename: str = Field(nullable=False)
+    content_type: str = Field(nullable=False)
+    total_size: int = Field(nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
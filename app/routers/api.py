@@ -0,0 +1,193 @@
+import base64
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, func, or_
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..database import get_session
+from ..models import ArchiveMonth, Image
+
+# Load settings and configure router
+settings = get_settings()
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+
+def _serialize(image: Image) -> dict:
+    """Returns the compact JSON representation of an image."""
+    return {
+        "id": image.id,
+        "url": f"/images/{image.filename}",
+        "width": image.width,
+        "height": image.height,
+        "date": image.upload_date.isoformat() + "Z",
+    }
+
+
+def _encode_cursor(image: Image) -> str:
+    """Encodes the position after an image as an opaque cursor."""
+    position = f"{image.upload_date.isoformat()}|{image.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodes a cursor into the upload date and ID of the last returned image.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        upload_date, image_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(upload_date), int(image_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _feed_version(session: Session) -> tuple:
+    """
+    Returns values that change whenever the feed changes, each read from an
+    index or the monthly rollup: the image count, the newest ID and upload
+    date, and how many images still lack their dimensions.
+    """
+    image_count = session.exec(
+        select(func.coalesce(func.sum(ArchiveMonth.image_count), 0))
+    ).one()
+    latest_id = session.exec(select(func.max(Image.id))).one()
+    latest_date = session.exec(select(func.max(Image.upload_date))).one()
+    missing_dimensions = session.exec(
+        select(func.count()).select_from(Image).where(Image.width.is_(None))
+    ).one()
+    return image_count, latest_id or 0, latest_date, missing_dimensions
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compares an If-None-Match header with an ETag, using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+@router.get("/images")
+async def list_images(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.API_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+    session: Session = Depends(get_session),
+):
+    """
+    Returns a page of the feed as JSON, newest first.
+
+    Pages are chained with `next_cursor`. With `since`, only images added after
+    the image with that ID are returned, so clients can sync incrementally by
+    passing the `latest_id` of their previous sync. Responses carry a weak ETag
+    of the feed's current state, and a matching If-None-Match is answered with
+    304 Not Modified without querying the page.
+
+    Args:
+        request: The HTTP request object.
+        limit: Number of images per page; defaults to IMAGES_PER_PAGE.
+        cursor: The `next_cursor` of the previous page.
+        since: Only return images with a greater ID.
+        session: Database session dependency.
+
+    Returns:
+        JSONResponse: The images, the cursor of the next page and the newest image ID.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    limit = limit or settings.IMAGES_PER_PAGE
+    version = _feed_version(session)
+    digest = hashlib.sha256(repr((version, limit, cursor, since)).encode()).hexdigest()
+    headers = {"ETag": f'W/"{digest[:32]}"', "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    query = (
+        select(Image)
+        .order_by(Image.upload_date.desc(), Image.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        upload_date, image_id = _decode_cursor(cursor)
+        query = query.where(
+            or_(
+                Image.upload_date < upload_date,
+                and_(Image.upload_date == upload_date, Image.id < image_id),
+            )
+        )
+    if since is not None:
+        query = query.where(Image.id > since)
+
+    images = session.exec(query).all()
+    has_more = len(images) > limit
+    images = images[:limit]
+
+    return JSONResponse(
+        content={
+            "items": [_serialize(image) for image in images],
+            "next_cursor": _encode_cursor(images[-1]) if has_more else None,
+            "latest_id": version[1],
+        },
+        headers=headers,
+    )
+
+
+@router.get("/images/batch")
+async def batch_images(
+    ids: str = Query(..., description="Comma-separated image IDs"),
+    session: Session = Depends(get_session),
+):
+    """
+    Returns the metadata of several images in one request.
+
+    Args:
+        ids: Comma-separated image IDs, at most API_MAX_PAGE_SIZE.
+        session: Database session dependency.
+
+    Returns:
+        dict: The images found, in the requested order; unknown IDs are omitted.
+
+    Raises:
+        HTTPException: If the IDs are malformed or too many.
+    """
+    try:
+        image_ids = list(
+            dict.fromkeys(int(value) for value in ids.split(",") if value.strip())
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image IDs"
+        )
+    if len(image_ids) > settings.API_MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.API_MAX_PAGE_SIZE} image IDs are allowed",
+        )
+
+    images = session.exec(select(Image).where(Image.id.in_(image_ids))).all()
+    images_by_id = {image.id: image for image in images}
+
+    return {
+        "items": [
+            _serialize(images_by_id[image_id])
+            for image_id in image_ids
+            if image_id in images_by_id
+        ]
+    }
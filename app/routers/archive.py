@@ -0,0 +1,152 @@
+import calendar
+from itertools import groupby
+
+from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import HTMLResponse
+from sqlmodel import Session, select
+
+from ..archive import month_range
+from ..database import get_session
+from ..models import ArchiveMonth, Image
+from ..config import get_settings
+from ..templating import stream_template
+
+# Load settings and configure router
+settings = get_settings()
+router = APIRouter(prefix="/archive", tags=["archive"])
+
+
+def _month_images(session: Session, year: int, month: int, page: int) -> list[Image]:
+    """
+    Loads a page of a month's images with an indexed range scan on upload_date.
+
+    Raises:
+        HTTPException: If the month or page is invalid.
+    """
+    if not 1 <= month <= 12 or page < 1:
+        raise HTTPException(status_code=404, detail="Month not found")
+
+    try:
+        start, end = month_range(year, month)
+    except ValueError:
+        # The year, or the end of December 9999, is outside datetime's range
+        raise HTTPException(status_code=404, detail="Month not found")
+    offset = (page - 1) * settings.IMAGES_PER_PAGE
+    return session.exec(
+        select(Image)
+        .where(Image.upload_date >= start)
+        .where(Image.upload_date < end)
+        .order_by(Image.upload_date.desc())
+        .offset(offset)
+        .limit(settings.IMAGES_PER_PAGE)
+    ).all()
+
+
+def _next_url(year: int, month: int, page: int, images: list[Image]):
+    """Returns the URL of the following page, or None on the last page."""
+    if len(images) < settings.IMAGES_PER_PAGE:
+        return None
+    return f"/archive/{year}/{month:02d}/images?page={page + 1}"
+
+
+@router.get("", response_class=HTMLResponse)
+async def archive_index(request: Request, session: Session = Depends(get_session)):
+    """
+    Displays all months with images, newest first, read from the monthly rollup.
+
+    Args:
+        request: The HTTP request object.
+        session: Database session dependency.
+
+    Returns:
+        StreamingResponse: The archive index page.
+    """
+    rows = session.exec(
+        select(ArchiveMonth, Image.filename)
+        .join(Image, Image.id == ArchiveMonth.cover_image_id, isouter=True)
+        .order_by(ArchiveMonth.year.desc(), ArchiveMonth.month.desc())
+    ).all()
+
+    years = [
+        (
+            year,
+            [
+                {
+                    "year": archive_month.year,
+                    "month": archive_month.month,
+                    "name": calendar.month_name[archive_month.month],
+                    "image_count": archive_month.image_count,
+                    "cover_filename": cover_filename,
+                }
+                for archive_month, cover_filename in months
+            ],
+        )
+        for year, months in groupby(rows, key=lambda row: row[0].year)
+    ]
+
+    return stream_template("archive.html", {"request": request, "years": years})
+
+
+@router.get("/{year}/{month}", response_class=HTMLResponse)
+async def archive_month(
+    request: Request,
+    year: int,
+    month: int,
+    session: Session = Depends(get_session),
+):
+    """
+    Displays the images uploaded in one month, newest first.
+
+    Args:
+        request: The HTTP request object.
+        year: The year of the month.
+        month: The month, from 1 to 12.
+        session: Database session dependency.
+
+    Returns:
+        StreamingResponse: The month page with the first page of images.
+    """
+    images = _month_images(session, year, month, page=1)
+
+    return stream_template(
+        "archive_month.html",
+        {
+            "request": request,
+            "title": f"{calendar.month_name[month]} {year}",
+            "images": images,
+            "next_url": _next_url(year, month, 1, images),
+        },
+    )
+
+
+@router.get("/{year}/{month}/images", response_class=HTMLResponse)
+async def archive_month_images(
+    request: Request,
+    year: int,
+    month: int,
+    page: int = 1,
+    session: Session = Depends(get_session),
+):
+    """
+    Loads a page of a month's images for infinite scrolling.
+
+    Args:
+        request: The HTTP request object.
+        year: The year of the month.
+        month: The month, from 1 to 12.
+        page: The current page number.
+        session: Database session dependency.
+
+    Returns:
+        StreamingResponse: Partial HTML with a list of images for the requested page.
+    """
+    images = _month_images(session, year, month, page)
+
+    return stream_template(
+        "partials/image_list.html",
+        {
+            "request": request,
+            "images": images,
+            "next_url": _next_url(year, month, page, images),
+        },
+    )
@@ -2,17 +2,16 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, Request, Response, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 from sqlmodel import Session
 
 from ..database import get_session
 from ..security import authenticate_user, create_access_token, get_current_user
 from ..config import get_settings
+from ..templating import templates
 
 # Load settings and configure router and templates
 settings = get_settings()
 router = APIRouter(tags=["authentication"])
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/login", response_class=HTMLResponse)
@@ -60,7 +59,17 @@ async def login(
         JSONResponse: Response indicating success or failure, with a redirect header on success.
     """
     # Authenticate the user
-    user = authenticate_user(form_data.username, form_data.password, session)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password, session)
+    except HTTPException as e:
+        # Reject quickly when too many logins are being processed
+        return templates.TemplateResponse(
+            "partials/error_message.html",
+            {"request": request, "error_message": e.detail},
+            status_code=e.status_code,
+            headers=e.headers,
+        )
+
     if not user:
         # Render error message if authentication fails
         return templates.TemplateResponse(
@@ -1,20 +1,27 @@
-from fastapi import APIRouter, Depends, Request, File, UploadFile, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request, File, UploadFile, HTTPException, status
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    FileResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
-from datetime import datetime, time
-import pytz
 
 from ..database import get_session
 from ..models import User, Image
 from ..security import get_current_user
 from ..config import get_settings
 from ..image_processing import process_and_save_image
+from ..storage import get_storage
+from ..uploads import daily_upload_limit_reached
+from ..archive import record_upload
+from ..templating import templates, stream_template
 
 # Load settings and configure router and templates
 settings = get_settings()
 router = APIRouter(tags=["images"])
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -27,7 +34,7 @@ async def index(request: Request, session: Session = Depends(get_session)):
         session: Database session dependency.
 
     Returns:
-        TemplateResponse: The main page with a list of images.
+        StreamingResponse: The main page with a list of images.
     """
     page = 1
     offset = (page - 1) * settings.IMAGES_PER_PAGE
@@ -39,10 +46,10 @@ async def index(request: Request, session: Session = Depends(get_session)):
     ).all()
 
     more_images_available = len(images) == settings.IMAGES_PER_PAGE
-    next_page = page + 1 if more_images_available else None
+    next_url = f"/load_images?page={page + 1}" if more_images_available else None
 
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "images": images, "next_page": next_page}
+    return stream_template(
+        "index.html", {"request": request, "images": images, "next_url": next_url}
     )
 
 
@@ -81,22 +88,7 @@ async def upload_image(
     Returns:
         JSONResponse: Success response with redirect header or error message.
     """
-    tz = pytz.timezone(settings.TIMEZONE)
-    now = datetime.now(tz)
-
-    start_of_day = datetime.combine(now.date(), time.min, tzinfo=tz)
-    end_of_day = datetime.combine(now.date(), time.max, tzinfo=tz)
-
-    daily_upload_count = session.exec(
-        select(Image)
-        .where(Image.user_id == current_user.id)
-        .where(Image.upload_date >= start_of_day)
-        .where(Image.upload_date <= end_of_day)
-    ).all()
-
-    daily_upload_count = len(daily_upload_count)
-
-    if daily_upload_count >= settings.MAX_UPLOADS_PER_DAY:
+    if daily_upload_limit_reached(session, current_user.id):
         return templates.TemplateResponse(
             "partials/error_message.html",
             {
@@ -106,22 +98,33 @@ async def upload_image(
             status_code=200,
         )
 
+    # Release the database connection while the upload waits for admission
+    session.commit()
+
     try:
-        filename = await process_and_save_image(file, user_id=current_user.id)
+        stored = await process_and_save_image(file, user_id=current_user.id)
 
         image = Image(
-            filename=filename, original_filename=file.filename, user_id=current_user.id
+            filename=stored.filename,
+            original_filename=file.filename,
+            user_id=current_user.id,
+            width=stored.width,
+            height=stored.height,
         )
         session.add(image)
+        record_upload(session, image)
         session.commit()
 
         return JSONResponse(content={"success": True}, headers={"HX-Redirect": "/"})
 
     except HTTPException as e:
+        # Overload keeps its status so clients can honor Retry-After
+        overloaded = e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
         return templates.TemplateResponse(
             "partials/error_message.html",
             {"request": request, "error_message": e.detail},
-            status_code=200,
+            status_code=e.status_code if overloaded else 200,
+            headers=e.headers if overloaded else None,
         )
     except Exception as e:
         return templates.TemplateResponse(
@@ -144,7 +147,7 @@ async def load_images(
         session: Database session dependency.
 
     Returns:
-        TemplateResponse: Partial HTML with a list of images for the requested page.
+        StreamingResponse: Partial HTML with a list of images for the requested page.
     """
     offset = (page - 1) * settings.IMAGES_PER_PAGE
     images = session.exec(
@@ -155,11 +158,11 @@ async def load_images(
     ).all()
 
     more_images_available = len(images) == settings.IMAGES_PER_PAGE
-    next_page = page + 1 if more_images_available else None
+    next_url = f"/load_images?page={page + 1}" if more_images_available else None
 
-    return templates.TemplateResponse(
+    return stream_template(
         "partials/image_list.html",
-        {"request": request, "images": images, "next_page": next_page},
+        {"request": request, "images": images, "next_url": next_url},
     )
 
 
@@ -168,12 +171,15 @@ async def get_image(filename: str, session: Session = Depends(get_session)):
     """
     Serves a stored image file if the file exists.
 
+    Local files are sent directly. Images in an object store are either
+    redirected to a presigned URL or streamed through in chunks.
+
     Args:
         filename: The unique filename of the stored image.
         session: Database session dependency.
 
     Returns:
-        FileResponse: The image file response.
+        FileResponse | RedirectResponse | StreamingResponse: The image response.
 
     Raises:
         HTTPException: If the image is not found or the filename is invalid.
@@ -188,15 +194,33 @@ async def get_image(filename: str, session: Session = Depends(get_session)):
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # Construct the full path to the image file
-    file_path = settings.UPLOAD_FOLDER / filename
+    storage = get_storage()
 
-    if not file_path.exists():
+    # Local files are sent by the server directly, with range and caching support
+    file_path = storage.path(filename)
+    if file_path is not None:
+        if not file_path.exists():
+            raise HTTPException(status_code=404, detail="Image file not found")
+
+        return FileResponse(
+            file_path,
+            media_type="image/jpeg",
+            filename=image.filename,
+            headers={"Content-Disposition": "inline"},
+        )
+
+    # Let the client fetch the bytes from the object store, bypassing the app
+    url = storage.url(filename)
+    if url is not None:
+        return RedirectResponse(url, status_code=307)
+
+    try:
+        chunks = await run_in_threadpool(storage.stream, filename)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Image file not found")
 
-    return FileResponse(
-        file_path,
+    return StreamingResponse(
+        chunks,
         media_type="image/jpeg",
-        filename=image.filename,
         headers={"Content-Disposition": "inline"},
     )
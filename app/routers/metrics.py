@@ -0,0 +1,68 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import security
+from ..admission import upload_admission
+from ..config import get_settings
+
+# Load settings and configure router
+settings = get_settings()
+router = APIRouter(tags=["metrics"])
+
+# Metric name, type and help text for each value of the upload admission state
+UPLOAD_ADMISSION_METRICS = [
+    ("running", "gauge", "Uploads being processed."),
+    ("waiting", "gauge", "Uploads waiting for admission."),
+    ("pixels_in_flight", "gauge", "Pixels of the uploads being processed."),
+    ("bytes_in_flight", "gauge", "Bytes of the uploads being processed."),
+    ("admitted_total", "counter", "Uploads admitted for processing."),
+    ("rejected_queue_full_total", "counter", "Uploads rejected on a full queue."),
+    ("rejected_timeout_total", "counter", "Uploads rejected after waiting too long."),
+    ("wait_seconds_total", "counter", "Time uploads spent waiting for admission."),
+]
+
+
+def _metric(name: str, metric_type: str, help_text: str, value) -> str:
+    """Formats a metric in the Prometheus text format."""
+    return f"# HELP {name} {help_text}\n# TYPE {name} {metric_type}\n{name} {value}\n"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Exposes the state of upload admission and login load shedding
+    in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: The metrics of this process.
+    """
+    upload_state = upload_admission.metrics()
+    lines = [
+        _metric(
+            f"photolog_upload_admission_{key}",
+            metric_type,
+            help_text,
+            upload_state[key],
+        )
+        for key, metric_type, help_text in UPLOAD_ADMISSION_METRICS
+    ]
+    lines.append(
+        _metric(
+            "photolog_login_pending_verifications",
+            "gauge",
+            "Password verifications running or queued.",
+            security.pending_verifications,
+        )
+    )
+    lines.append(
+        _metric(
+            "photolog_login_rejected_total",
+            "counter",
+            "Logins rejected because too many verifications were pending.",
+            security.rejected_verifications_total,
+        )
+    )
+
+    return PlainTextResponse(
+        "".join(lines), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
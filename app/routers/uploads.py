@@ -0,0 +1,201 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlmodel import Session
+
+from ..database import get_session
+from ..models import User
+from ..security import get_current_user
+from ..config import get_settings
+from ..uploads import (
+    append_chunk,
+    create_upload_session,
+    daily_upload_limit_reached,
+    delete_upload_session,
+    finalize_upload_session,
+    get_upload_offset,
+    get_upload_session,
+)
+
+# Load settings and configure router
+settings = get_settings()
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+
+
+def _offset_headers(offset: int, total_size: int) -> dict:
+    """Builds the headers describing the state of an upload session."""
+    return {
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(total_size),
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    data: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Starts a resumable upload session. Checks if the user has reached the daily
+    upload limit before any bytes are transferred.
+
+    Args:
+        data: The filename, content type and size of the file to upload.
+        current_user: The currently authenticated user.
+        session: Database session dependency.
+
+    Returns:
+        JSONResponse: The upload session ID, the current offset and the preferred chunk size.
+    """
+    if daily_upload_limit_reached(session, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"You have reached your daily upload limit of {settings.MAX_UPLOADS_PER_DAY} image(s).",
+        )
+
+    upload = create_upload_session(
+        session,
+        user_id=current_user.id,
+        filename=data.filename,
+        content_type=data.content_type,
+        total_size=data.size,
+    )
+
+    return JSONResponse(
+        content={
+            "id": upload.id,
+            "offset": 0,
+            "size": upload.total_size,
+            "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+        },
+        status_code=status.HTTP_201_CREATED,
+        headers={
+            "Location": f"/uploads/{upload.id}",
+            **_offset_headers(0, upload.total_size),
+        },
+    )
+
+
+@router.get("/{upload_id}")
+async def get_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Returns the current offset of an upload session so the client can resume.
+
+    Args:
+        upload_id: The ID of the upload session.
+        current_user: The currently authenticated user.
+        session: Database session dependency.
+
+    Returns:
+        JSONResponse: The current offset and the declared size of the upload.
+    """
+    upload = get_upload_session(session, upload_id, current_user.id)
+    offset = get_upload_offset(upload)
+
+    return JSONResponse(
+        content={"id": upload.id, "offset": offset, "size": upload.total_size},
+        headers=_offset_headers(offset, upload.total_size),
+    )
+
+
+@router.put("/{upload_id}")
+async def put_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Appends the request body to an upload session at the offset given in the
+    `Upload-Offset` header.
+
+    Args:
+        upload_id: The ID of the upload session.
+        request: The HTTP request object, whose body is the chunk.
+        upload_offset: The offset at which the chunk starts.
+        current_user: The currently authenticated user.
+        session: Database session dependency.
+
+    Returns:
+        JSONResponse: The new offset of the upload.
+    """
+    upload = get_upload_session(session, upload_id, current_user.id)
+    offset = await append_chunk(session, upload, upload_offset, request.stream())
+
+    return JSONResponse(
+        content={"id": upload.id, "offset": offset, "size": upload.total_size},
+        headers=_offset_headers(offset, upload.total_size),
+    )
+
+
+@router.post("/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Finalizes a completely transferred upload: the assembled file is processed
+    and saved like a regular upload, then its metadata is stored in the database.
+
+    Args:
+        upload_id: The ID of the upload session.
+        current_user: The currently authenticated user.
+        session: Database session dependency.
+
+    Returns:
+        JSONResponse: Success response with redirect header.
+    """
+    upload = get_upload_session(session, upload_id, current_user.id)
+
+    if daily_upload_limit_reached(session, current_user.id):
+        delete_upload_session(session, upload)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"You have reached your daily upload limit of {settings.MAX_UPLOADS_PER_DAY} image(s).",
+        )
+
+    try:
+        await finalize_upload_session(session, upload)
+    except HTTPException as e:
+        # Invalid images cannot be fixed by resuming, so drop the session
+        if e.status_code == status.HTTP_400_BAD_REQUEST:
+            delete_upload_session(session, upload)
+        raise
+
+    return JSONResponse(content={"success": True}, headers={"HX-Redirect": "/"})
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Cancels an upload session and discards the received bytes.
+
+    Args:
+        upload_id: The ID of the upload session.
+        current_user: The currently authenticated user.
+        session: Database session dependency.
+
+    Returns:
+        Response: Empty response.
+    """
+    upload = get_upload_session(session, upload_id, current_user.id)
+    delete_upload_session(session, upload)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 import jwt
@@ -16,8 +19,10 @@ from .models import User as UserModel
 # Load settings
 settings = get_settings()
 
-# Initialize password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Number of password verifications running or waiting in the thread pool
+pending_verifications = 0
+# Number of logins rejected because too many verifications were pending
+rejected_verifications_total = 0
 # OAuth2 token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -27,23 +32,96 @@ class User(BaseModel):
     username: str
 
 
+@lru_cache()
+def get_pwd_context() -> CryptContext:
+    """Lazily initializes the password hashing context."""
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+    )
+
+
+@lru_cache()
+def get_password_executor() -> ThreadPoolExecutor:
+    """Lazily creates the bounded thread pool keeping bcrypt off the event loop."""
+    return ThreadPoolExecutor(
+        max_workers=settings.LOGIN_MAX_WORKERS, thread_name_prefix="password"
+    )
+
+
 # Password hashing and verification
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def hash_password(password: str) -> str:
     """Hashes a password using bcrypt."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+@lru_cache()
+def _dummy_hash() -> str:
+    """Hash verified for unknown usernames, so they take as long as known ones."""
+    return get_pwd_context().hash("photolog-dummy-password")
+
+
+def _verify_dummy_password(plain_password: str) -> bool:
+    """Verifies a plain password against the dummy hash."""
+    return get_pwd_context().verify(plain_password, _dummy_hash())
+
+
+def prepare_dummy_hash():
+    """
+    Computes the dummy hash ahead of the first login.
+
+    Otherwise the first unknown-username login also pays for hashing it and
+    takes about twice as long as a known one.
+    """
+    _dummy_hash()
+
+
+async def run_password_task(func, *args):
+    """
+    Runs a password hashing function in the bounded thread pool.
+
+    Args:
+        func: The function to run.
+        *args: Arguments passed to the function.
 
+    Returns:
+        The return value of the function.
+
+    Raises:
+        HTTPException: If too many verifications are already running or queued.
+    """
+    global pending_verifications, rejected_verifications_total
+
+    if pending_verifications >= settings.LOGIN_MAX_PENDING:
+        rejected_verifications_total += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts. Please try again shortly.",
+            headers={"Retry-After": str(settings.LOGIN_RETRY_AFTER_SECONDS)},
+        )
+
+    pending_verifications += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        pending_verifications -= 1
 
-def authenticate_user(
+
+async def authenticate_user(
     username: str, password: str, session: Session
 ) -> Optional[UserModel]:
     """
     Authenticates a user by username and password.
 
+    Password verification runs in a bounded thread pool. Unknown usernames are
+    verified against a dummy hash, and hashes created with an outdated bcrypt cost
+    are transparently replaced after a successful login.
+
     Args:
         username: The username of the user.
         password: The password of the user.
@@ -51,12 +129,32 @@ def authenticate_user(
 
     Returns:
         The authenticated User object if credentials are correct, otherwise None.
+
+    Raises:
+        HTTPException: If too many login attempts are already being processed.
     """
     user = session.exec(select(UserModel).where(UserModel.username == username)).first()
+    hashed_password = user.hashed_password if user else None
+
+    # End the read transaction so no pooled connection is held while hashing
+    session.commit()
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        await run_password_task(_verify_dummy_password, password)
+        return None
+
+    verified, new_hash = await run_password_task(
+        get_pwd_context().verify_and_update, password, hashed_password
+    )
+    if not verified:
         return None
 
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+
     return user
 
 
@@ -0,0 +1,304 @@
+import calendar
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from itertools import groupby
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from .assets import ENCODING_SUFFIXES, load_manifest, static_root
+from .compression import compress_bytes, supported_encodings
+from .config import get_settings
+from .models import Image
+from .storage import Storage, get_storage
+from .templating import templates
+
+settings = get_settings()
+
+MANIFEST_NAME = ".export-manifest.json"
+
+
+@dataclass
+class ExportStats:
+    """Counts of what an export run changed in the output directory."""
+
+    pages_written: int = 0
+    pages_unchanged: int = 0
+    pages_removed: int = 0
+    images_added: int = 0
+    images_removed: int = 0
+
+
+def _digest(*parts) -> str:
+    """Returns a stable digest of the data a page is rendered from."""
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _templates_fingerprint() -> str:
+    """
+    Digest of all template sources and the asset manifest, so template edits
+    and rebuilt assets with new fingerprinted URLs rewrite every page.
+    """
+    loader = templates.env.loader
+    sources = [
+        (name, loader.get_source(templates.env, name)[0])
+        for name in sorted(templates.env.list_templates())
+    ]
+    return _digest(sources, load_manifest(), settings.IMAGES_PER_PAGE)
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Writes a file through a temporary file, so readers never see partial pages."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _write_page(path: Path, html: str):
+    """Writes an HTML page together with its pre-compressed variants."""
+    data = html.encode()
+    _write_atomic(path, data)
+    for encoding in supported_encodings():
+        suffix = ENCODING_SUFFIXES[encoding]
+        _write_atomic(
+            path.with_name(path.name + suffix), compress_bytes(data, encoding)
+        )
+
+
+def _remove_page(path: Path):
+    """Removes an HTML page and its pre-compressed variants."""
+    for suffix in ("", ".gz", ".br"):
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def _feed_pages(rows: list) -> dict:
+    """
+    Splits the log into feed pages.
+
+    Pages are filled from the oldest image on, so an upload only changes the
+    newest page and the index; older pages keep their content and URL.
+
+    Returns:
+        A mapping of relative output paths to (template, context) pairs.
+    """
+    per_page = settings.IMAGES_PER_PAGE
+    buckets = [rows[i : i + per_page] for i in range(0, len(rows), per_page)]
+    pages = {}
+
+    for number, bucket in enumerate(buckets[:-1]):
+        pages[f"feed/{number}.html"] = (
+            "partials/image_list.html",
+            {
+                "images": bucket[::-1],
+                "next_url": f"/feed/{number - 1}.html" if number > 0 else None,
+            },
+        )
+
+    # The index shows the newest page, topped up with the one before if short
+    head = len(buckets) - 1
+    index_images = buckets[head][::-1] if buckets else []
+    next_number = head - 1
+    if buckets and len(index_images) < per_page and next_number >= 0:
+        index_images += buckets[next_number][::-1]
+        next_number -= 1
+    pages["index.html"] = (
+        "index.html",
+        {
+            "images": index_images,
+            "next_url": f"/feed/{next_number}.html" if next_number >= 0 else None,
+        },
+    )
+
+    return pages
+
+
+def _archive_pages(rows: list) -> dict:
+    """
+    Renders the archive index and one page per month with all of its images.
+
+    Returns:
+        A mapping of relative output paths to (template, context) pairs.
+    """
+    pages = {}
+    months = []
+
+    for (year, month), month_rows in groupby(
+        rows, key=lambda row: (row.upload_date.year, row.upload_date.month)
+    ):
+        month_rows = list(month_rows)
+        months.append(
+            {
+                "year": year,
+                "month": month,
+                "name": calendar.month_name[month],
+                "image_count": len(month_rows),
+                "cover_filename": month_rows[-1].filename,
+            }
+        )
+        pages[f"archive/{year}/{month:02d}/index.html"] = (
+            "archive_month.html",
+            {
+                "title": f"{calendar.month_name[month]} {year}",
+                "images": month_rows[::-1],
+                "next_url": None,
+            },
+        )
+
+    months.reverse()
+    years = [
+        (year, list(year_months))
+        for year, year_months in groupby(months, key=lambda month: month["year"])
+    ]
+    pages["archive/index.html"] = ("archive.html", {"years": years})
+
+    return pages
+
+
+def _page_key(context: dict) -> str:
+    """Digest of the data a page context is built from."""
+    images = [
+        (image.id, image.filename, image.upload_date)
+        for image in context.get("images", [])
+    ]
+    rest = {key: value for key, value in context.items() if key != "images"}
+    return _digest(images, rest)
+
+
+def _export_image(storage: Storage, filename: str, target: Path) -> bool:
+    """
+    Copies a stored image into the export, hardlinking local files when possible.
+
+    Returns:
+        bool: Whether the image was found in storage.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    source = storage.path(filename)
+    if source is None:
+        try:
+            _write_atomic(target, storage.get(filename))
+        except FileNotFoundError:
+            return False
+        return True
+
+    if not source.exists():
+        return False
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return True
+
+
+def _sync_static(output_dir: Path):
+    """
+    Mirrors the static assets, copying only files that changed and removing
+    files, including compressed variants, that are no longer built.
+    """
+    static_dir = static_root()
+    mirror_dir = output_dir / "static"
+    for target in list(mirror_dir.rglob("*")):
+        if (
+            target.is_file()
+            and not (static_dir / target.relative_to(mirror_dir)).is_file()
+        ):
+            target.unlink()
+
+    for source in static_dir.rglob("*"):
+        if not source.is_file():
+            continue
+        target = mirror_dir / source.relative_to(static_dir)
+        stat = source.stat()
+        try:
+            target_stat = target.stat()
+            if (target_stat.st_size, int(target_stat.st_mtime)) == (
+                stat.st_size,
+                int(stat.st_mtime),
+            ):
+                continue
+        except FileNotFoundError:
+            pass
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+
+
+def export_static(
+    session: Session, output_dir: Path, force: bool = False
+) -> ExportStats:
+    """
+    Exports the feed and archive as static files that any web server can serve.
+
+    Pages are rendered with the regular templates and written with `.gz` and,
+    when brotli is installed, `.br` variants. A manifest of page digests makes
+    re-runs incremental: only pages whose images changed are rewritten, and
+    missing images are hardlinked from local storage or downloaded from the
+    object store.
+
+    Args:
+        session: Database session to execute the query.
+        output_dir: Directory to write the site into.
+        force: Rewrite every page, even if unchanged.
+
+    Returns:
+        ExportStats: Counts of written, unchanged and removed files.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    stats = ExportStats()
+
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    # Changed templates or assets invalidate every page digest, but the
+    # previous page set is still needed to remove pages that are gone
+    fingerprint = _templates_fingerprint()
+    reuse_pages = not force and manifest.get("templates") == fingerprint
+    old_pages = manifest.get("pages", {})
+
+    rows = session.exec(
+        select(Image.id, Image.filename, Image.upload_date).order_by(
+            Image.upload_date, Image.id
+        )
+    ).all()
+
+    pages = {**_feed_pages(rows), **_archive_pages(rows)}
+    new_pages = {}
+    for relative_path, (template_name, context) in pages.items():
+        key = _page_key(context)
+        new_pages[relative_path] = key
+        path = output_dir / relative_path
+        if reuse_pages and old_pages.get(relative_path) == key and path.exists():
+            stats.pages_unchanged += 1
+            continue
+        html = templates.get_template(template_name).render(context)
+        _write_page(path, html)
+        stats.pages_written += 1
+
+    for relative_path in old_pages.keys() - new_pages.keys():
+        _remove_page(output_dir / relative_path)
+        stats.pages_removed += 1
+
+    # Images are immutable once stored, so presence is all that needs checking
+    images_dir = output_dir / "images"
+    images_dir.mkdir(exist_ok=True)
+    wanted = {row.filename for row in rows}
+    existing = {entry.name for entry in os.scandir(images_dir) if entry.is_file()}
+    storage = get_storage()
+    for filename in wanted - existing:
+        if _export_image(storage, filename, images_dir / filename):
+            stats.images_added += 1
+    for filename in existing - wanted:
+        (images_dir / filename).unlink()
+        stats.images_removed += 1
+
+    _sync_static(output_dir)
+
+    manifest = {"templates": fingerprint, "pages": new_pages}
+    _write_atomic(manifest_path, json.dumps(manifest).encode())
+
+    return stats
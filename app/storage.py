@@ -0,0 +1,309 @@
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from .config import get_settings
+
+settings = get_settings()
+
+
+class Storage(ABC):
+    """
+    Interface for storing processed images.
+
+    Names are flat filenames as stored in `Image.filename`. Reading a missing
+    file raises FileNotFoundError, independent of the backend.
+    """
+
+    @abstractmethod
+    def put(self, name: str, data: bytes, content_type: str = "image/jpeg"):
+        """Stores a file, replacing any file with the same name."""
+
+    @abstractmethod
+    def get(self, name: str) -> bytes:
+        """Returns the content of a file."""
+
+    @abstractmethod
+    def stream(self, name: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Returns an iterator over the content of a file.
+
+        The file is opened before returning, so a missing file raises
+        FileNotFoundError here rather than while the response is being sent.
+        """
+
+    @abstractmethod
+    def delete(self, name: str):
+        """Deletes a file; deleting a missing file is not an error."""
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        """Returns whether a file exists."""
+
+    @abstractmethod
+    def scan(self) -> Iterator[tuple[str, float]]:
+        """Yields the name and modification timestamp of every stored file."""
+
+    def path(self, name: str) -> Optional[Path]:
+        """Returns the local path of a file, if the backend stores files locally."""
+        return None
+
+    def url(self, name: str) -> Optional[str]:
+        """Returns a URL clients can fetch the file from directly, if supported."""
+        return None
+
+    def url_origin(self) -> Optional[str]:
+        """Returns the origin of the URLs returned by `url`, for the CSP."""
+        return None
+
+
+class LocalStorage(Storage):
+    """Stores images in a folder on the local filesystem."""
+
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+
+    def path(self, name: str) -> Path:
+        # Names are flat; anything else would escape the folder
+        if not name or name != Path(name).name or name.startswith("."):
+            raise FileNotFoundError(name)
+        return self.folder / name
+
+    def put(self, name: str, data: bytes, content_type: str = "image/jpeg"):
+        path = self.path(name)
+        tmp_path = path.with_name(f".{name}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def get(self, name: str) -> bytes:
+        return self.path(name).read_bytes()
+
+    def stream(self, name: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        file = self.path(name).open("rb")
+        return self._iter_file(file, chunk_size or settings.STORAGE_STREAM_CHUNK_SIZE)
+
+    @staticmethod
+    def _iter_file(file, chunk_size: int) -> Iterator[bytes]:
+        with file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    def delete(self, name: str):
+        self.path(name).unlink(missing_ok=True)
+
+    def exists(self, name: str) -> bool:
+        try:
+            return self.path(name).is_file()
+        except FileNotFoundError:
+            return False
+
+    def scan(self) -> Iterator[tuple[str, float]]:
+        # scandir returns file types with the names, so only files are stat'ed
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                # Temporary files of writes in progress start with a dot
+                if entry.name.startswith(".") or not entry.is_file(
+                    follow_symlinks=False
+                ):
+                    continue
+                yield entry.name, entry.stat().st_mtime
+
+
+class S3Storage(Storage):
+    """
+    Stores images in an S3-compatible bucket, e.g. AWS S3 or a local MinIO.
+
+    A single client with a pooled HTTP connection pool is shared by all
+    threads; boto3 clients are thread-safe.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        max_pool_connections: int = 20,
+        presigned_url_expires: Optional[int] = None,
+    ):
+        # boto3 is only needed, and only imported, when this backend is used
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.presigned_url_expires = presigned_url_expires
+        self.client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+        self._missing_errors = (self.client.exceptions.NoSuchKey,)
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    def put(self, name: str, data: bytes, content_type: str = "image/jpeg"):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(name),
+            Body=data,
+            ContentType=content_type,
+        )
+
+    def _get_object(self, name: str) -> dict:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(name))
+        except self._missing_errors:
+            raise FileNotFoundError(name)
+
+    def get(self, name: str) -> bytes:
+        return self._get_object(name)["Body"].read()
+
+    def stream(self, name: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        body = self._get_object(name)["Body"]
+        return self._iter_body(body, chunk_size or settings.STORAGE_STREAM_CHUNK_SIZE)
+
+    @staticmethod
+    def _iter_body(body, chunk_size: int) -> Iterator[bytes]:
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            # Returns the connection to the pool, even if the client disconnected
+            body.close()
+
+    def delete(self, name: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def exists(self, name: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise
+        return True
+
+    def scan(self) -> Iterator[tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                name = item["Key"][len(self.prefix) :]
+                if name and "/" not in name:
+                    yield name, item["LastModified"].timestamp()
+
+    def url(self, name: str) -> Optional[str]:
+        if not self.presigned_url_expires:
+            return None
+        # Signing is a local computation; no request is made to the bucket
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(name)},
+            ExpiresIn=self.presigned_url_expires,
+        )
+
+    def url_origin(self) -> Optional[str]:
+        url = self.url("origin")
+        if url is None:
+            return None
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+def check_storage(storage: Storage) -> list[str]:
+    """
+    Runs every storage operation on a probe file and reports what failed.
+
+    Verifies a backend's configuration end to end, e.g. against a local MinIO
+    before switching STORAGE_BACKEND. Listing the probe file scans the whole
+    backend, which takes a while for large buckets.
+
+    Args:
+        storage: The backend to check.
+
+    Returns:
+        list[str]: A description of every failed operation; empty if all passed.
+    """
+    name = f"storage-check-{uuid4().hex}.jpg"
+    data = os.urandom(3 * 64 * 1024 + 123)
+    problems = []
+
+    def check(operation: str, passed):
+        try:
+            if not passed():
+                problems.append(f"{operation}: unexpected result")
+        except Exception as e:
+            problems.append(f"{operation}: {type(e).__name__}: {e}")
+
+    def raises_not_found(call) -> bool:
+        try:
+            call()
+        except FileNotFoundError:
+            return True
+        return False
+
+    try:
+        check("put", lambda: storage.put(name, data) is None)
+        if problems:
+            # Nothing else can pass without the probe file
+            return problems
+        check("exists", lambda: storage.exists(name))
+        check("get", lambda: storage.get(name) == data)
+        check(
+            "stream",
+            lambda: b"".join(storage.stream(name, chunk_size=64 * 1024)) == data,
+        )
+        check("scan", lambda: name in dict(storage.scan()))
+        check("delete", lambda: storage.delete(name) is None)
+        check("exists after delete", lambda: not storage.exists(name))
+        check("get missing", lambda: raises_not_found(lambda: storage.get(name)))
+        check("stream missing", lambda: raises_not_found(lambda: storage.stream(name)))
+        check("delete missing", lambda: storage.delete(name) is None)
+    finally:
+        try:
+            storage.delete(name)
+        except Exception:
+            pass
+    return problems
+
+
+@lru_cache()
+def get_storage() -> Storage:
+    """
+    Returns the configured storage backend.
+
+    Raises:
+        ValueError: If STORAGE_BACKEND names an unknown backend.
+    """
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.UPLOAD_FOLDER)
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            presigned_url_expires=(
+                settings.S3_PRESIGNED_URL_EXPIRES
+                if settings.S3_PRESIGNED_URLS
+                else None
+            ),
+        )
+    raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
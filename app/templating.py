@@ -0,0 +1,67 @@
+from typing import Optional
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+
+from .assets import asset_url
+from .config import get_settings
+
+settings = get_settings()
+
+# Shared template environment; compiled templates are cached on disk so new
+# workers skip parsing and code generation
+templates = Jinja2Templates(directory="templates")
+templates.env.bytecode_cache = FileSystemBytecodeCache(
+    str(settings.TEMPLATE_CACHE_FOLDER)
+)
+templates.env.globals["asset_url"] = asset_url
+
+
+def precompile_templates():
+    """
+    Compiles all templates ahead of the first request.
+
+    This fills the in-memory template cache of the current worker and the
+    bytecode cache on disk that later workers load from.
+    """
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+
+
+async def _iterate(chunks):
+    """Wraps a template stream so it is rendered on the event loop."""
+    for chunk in chunks:
+        yield chunk
+
+
+def stream_template(
+    name: str,
+    context: dict,
+    status_code: int = 200,
+    headers: Optional[dict] = None,
+) -> StreamingResponse:
+    """
+    Renders a template as a streaming HTML response.
+
+    The template output is flushed in small buffered chunks, so the client
+    receives the page head and first figures before rendering is complete.
+
+    Args:
+        name: The name of the template to render.
+        context: The template context.
+        status_code: The HTTP status code of the response.
+        headers: Optional additional response headers.
+
+    Returns:
+        StreamingResponse: The rendered template.
+    """
+    stream = templates.get_template(name).stream(context)
+    stream.enable_buffering(settings.TEMPLATE_STREAM_BUFFER_SIZE)
+
+    return StreamingResponse(
+        _iterate(stream),
+        status_code=status_code,
+        headers=headers,
+        media_type="text/html; charset=utf-8",
+    )
@@ -0,0 +1,359 @@
+import asyncio
+import fcntl
+import logging
+import os
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+from uuid import uuid4
+
+import pytz
+from fastapi import HTTPException, UploadFile, status
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from .archive import record_upload
+from .config import get_settings
+from .database import get_engine
+from .image_processing import ALLOWED_CONTENT_TYPES, process_and_save_image
+from .models import Image, UploadSession
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def daily_upload_limit_reached(session: Session, user_id: int) -> bool:
+    """
+    Checks whether a user has already uploaded the maximum number of images today.
+
+    Args:
+        session: Database session to execute the query.
+        user_id: The ID of the user uploading the image.
+
+    Returns:
+        True if the daily upload limit is reached, otherwise False.
+    """
+    tz = pytz.timezone(settings.TIMEZONE)
+    now = datetime.now(tz)
+
+    start_of_day = datetime.combine(now.date(), time.min, tzinfo=tz)
+    end_of_day = datetime.combine(now.date(), time.max, tzinfo=tz)
+
+    daily_upload_count = session.exec(
+        select(Image)
+        .where(Image.user_id == user_id)
+        .where(Image.upload_date >= start_of_day)
+        .where(Image.upload_date <= end_of_day)
+    ).all()
+
+    return len(daily_upload_count) >= settings.MAX_UPLOADS_PER_DAY
+
+
+def _part_path(upload_id: str) -> Path:
+    """Returns the path of the temporary file holding the bytes of an upload."""
+    return Path(settings.UPLOAD_SESSION_FOLDER) / f"{upload_id}.part"
+
+
+def _open_locked(part_path: Path, mode: str, detail: str) -> BinaryIO:
+    """
+    Opens the temporary file of an upload and takes its exclusive lock, which
+    serializes writers and finalizers across workers. Blocks, so it is run in
+    the thread pool.
+
+    Raises:
+        HTTPException: 409 if another request holds the lock.
+    """
+    part_file = open(part_path, mode)
+    try:
+        fcntl.flock(part_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        offset = os.fstat(part_file.fileno()).st_size
+        part_file.close()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail,
+            headers={"Upload-Offset": str(offset)},
+        )
+    return part_file
+
+
+def get_upload_offset(upload: UploadSession) -> int:
+    """
+    Returns the number of bytes received so far for an upload session.
+
+    Args:
+        upload: The upload session.
+
+    Returns:
+        The size of the temporary file, or 0 if no chunk was received yet.
+    """
+    try:
+        return _part_path(upload.id).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def create_upload_session(
+    session: Session,
+    user_id: int,
+    filename: str,
+    content_type: str,
+    total_size: int,
+) -> UploadSession:
+    """
+    Creates a new resumable upload session after validating the declared file.
+
+    Args:
+        session: Database session to execute the query.
+        user_id: The ID of the user uploading the image.
+        filename: The original filename of the image.
+        content_type: The declared content type of the image.
+        total_size: The declared size of the image in bytes.
+
+    Returns:
+        The created UploadSession.
+
+    Raises:
+        HTTPException: If the file is too large or has an unsupported format.
+    """
+    if total_size <= 0:
+        raise HTTPException(status_code=400, detail="The file is empty.")
+
+    if total_size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400, detail="File too large. Max size is 10 MB."
+        )
+
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file format. Only JPEG, PNG, and TIFF images are allowed.",
+        )
+
+    upload = UploadSession(
+        id=uuid4().hex,
+        user_id=user_id,
+        original_filename=filename,
+        content_type=content_type,
+        total_size=total_size,
+    )
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    return upload
+
+
+def get_upload_session(session: Session, upload_id: str, user_id: int) -> UploadSession:
+    """
+    Looks up an upload session owned by the given user.
+
+    Args:
+        session: Database session to execute the query.
+        upload_id: The ID of the upload session.
+        user_id: The ID of the user owning the session.
+
+    Returns:
+        The UploadSession.
+
+    Raises:
+        HTTPException: If the session does not exist, has expired or belongs to another user.
+    """
+    upload = session.get(UploadSession, upload_id)
+    if not upload or upload.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Upload session not found or expired.",
+        )
+    return upload
+
+
+async def append_chunk(
+    session: Session,
+    upload: UploadSession,
+    offset: int,
+    chunks: AsyncIterator[bytes],
+) -> int:
+    """
+    Appends a chunk of bytes at the given offset of an upload session.
+
+    The chunk is written as it arrives, so an interrupted request still advances
+    the offset by the bytes that made it to disk.
+
+    Args:
+        session: Database session to execute the query.
+        upload: The upload session.
+        offset: The offset at which the client wants to write the chunk.
+        chunks: The body of the request, as an async iterator of bytes.
+
+    Returns:
+        The new offset of the upload session.
+
+    Raises:
+        HTTPException: If the offset does not match, another chunk is being written
+            concurrently, or the chunk exceeds the declared file size.
+    """
+    # File operations block, so they run in the thread pool; a second writer
+    # is told to resync
+    part_file = await run_in_threadpool(
+        _open_locked,
+        _part_path(upload.id),
+        "ab",
+        "Another chunk is being written for this upload.",
+    )
+    try:
+        current_offset = await run_in_threadpool(part_file.seek, 0, os.SEEK_END)
+        if offset != current_offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Offset does not match the current upload offset.",
+                headers={"Upload-Offset": str(current_offset)},
+            )
+
+        async for chunk in chunks:
+            if current_offset + len(chunk) > upload.total_size:
+                await run_in_threadpool(
+                    part_file.write, chunk[: upload.total_size - current_offset]
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Chunk exceeds the declared file size.",
+                    headers={"Upload-Offset": str(upload.total_size)},
+                )
+            await run_in_threadpool(part_file.write, chunk)
+            current_offset += len(chunk)
+    finally:
+        await run_in_threadpool(part_file.close)
+
+    upload.updated_at = datetime.utcnow()
+    session.add(upload)
+    session.commit()
+
+    return current_offset
+
+
+async def finalize_upload_session(session: Session, upload: UploadSession) -> Image:
+    """
+    Hands a completely received upload to the regular image processing and
+    stores the resulting image.
+
+    Args:
+        session: Database session to execute the query.
+        upload: The upload session.
+
+    Returns:
+        The stored Image.
+
+    Raises:
+        HTTPException: If the upload is incomplete, already finalized by another
+            request, or the image fails validation.
+    """
+    offset = get_upload_offset(upload)
+    if offset != upload.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The upload is not complete yet.",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    upload_id, user_id = upload.id, upload.user_id
+    # Release the database connection while the upload waits for admission
+    session.commit()
+
+    part_path = _part_path(upload_id)
+    try:
+        part_file = await run_in_threadpool(
+            _open_locked, part_path, "rb", "The upload is already being finalized."
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Upload session not found or expired.",
+        )
+
+    # The lock is held until the session is gone, so a finalizer that waited
+    # for it finds the session deleted instead of storing the image twice
+    try:
+        upload = get_upload_session(session, upload_id, user_id)
+        file = UploadFile(filename=upload.original_filename, file=part_file)
+        stored = await process_and_save_image(
+            file, user_id=upload.user_id, content_type=upload.content_type
+        )
+
+        image = Image(
+            filename=stored.filename,
+            original_filename=upload.original_filename,
+            user_id=upload.user_id,
+            width=stored.width,
+            height=stored.height,
+        )
+        session.add(image)
+        record_upload(session, image)
+        session.delete(upload)
+        session.commit()
+        await run_in_threadpool(part_path.unlink, missing_ok=True)
+    finally:
+        await run_in_threadpool(part_file.close)
+
+    return image
+
+
+def delete_upload_session(session: Session, upload: UploadSession):
+    """
+    Deletes an upload session and its temporary file.
+
+    Args:
+        session: Database session to execute the query.
+        upload: The upload session.
+    """
+    _part_path(upload.id).unlink(missing_ok=True)
+    session.delete(upload)
+    session.commit()
+
+
+def purge_expired_upload_sessions(session: Session) -> int:
+    """
+    Deletes upload sessions that have not received a chunk within the session TTL,
+    together with temporary files no session refers to anymore.
+
+    Args:
+        session: Database session to execute the query.
+
+    Returns:
+        The number of purged upload sessions.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+    expired = session.exec(
+        select(UploadSession).where(UploadSession.updated_at < cutoff)
+    ).all()
+
+    for upload in expired:
+        _part_path(upload.id).unlink(missing_ok=True)
+        session.delete(upload)
+    session.commit()
+
+    # Remove stray temporary files, e.g. left behind by a crash during finalize
+    known_ids = set(session.exec(select(UploadSession.id)).all())
+    cutoff_timestamp = cutoff.replace(tzinfo=pytz.utc).timestamp()
+    for part_path in Path(settings.UPLOAD_SESSION_FOLDER).glob("*.part"):
+        if part_path.stem in known_ids:
+            continue
+        try:
+            if part_path.stat().st_mtime < cutoff_timestamp:
+                part_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    return len(expired)
+
+
+async def upload_session_gc_loop():
+    """Periodically purges abandoned upload sessions for the lifetime of the app."""
+    while True:
+        await asyncio.sleep(settings.UPLOAD_SESSION_GC_INTERVAL_SECONDS)
+        try:
+            with Session(get_engine()) as session:
+                purged = purge_expired_upload_sessions(session)
+            if purged:
+                logger.info("Purged %d abandoned upload session(s).", purged)
+        except Exception:
+            logger.exception("Failed to purge abandoned upload sessions.")
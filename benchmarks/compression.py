@@ -0,0 +1,110 @@
+"""
+Compression benchmark for HTML responses and static assets.
+
+Renders the feed pages with synthetic images and reads the static assets,
+then reports the compressed size, the savings and the CPU time per payload
+for the on-the-fly settings and the build-time (maximum) settings.
+
+Usage:
+    uv run python benchmarks/compression.py [--runs 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_payloads() -> dict:
+    """Returns the benchmarked payloads by name."""
+    from app.config import get_settings
+    from app.templating import templates
+
+    settings = get_settings()
+    images = [
+        SimpleNamespace(
+            id=i,
+            filename=f"{i:032x}_1.jpg",
+            upload_date=datetime(2024, 1, 1) + timedelta(days=i),
+        )
+        for i in range(settings.IMAGES_PER_PAGE)
+    ]
+    context = {"images": images, "next_url": "/load_images?page=2"}
+
+    return {
+        "index.html": templates.get_template("index.html").render(context).encode(),
+        "load_images": templates.get_template("partials/image_list.html")
+        .render(context)
+        .encode(),
+        "styles.css": (ROOT / "static" / "css" / "styles.css").read_bytes(),
+        "site.webmanifest": (
+            ROOT / "static" / "favicon" / "site.webmanifest"
+        ).read_bytes(),
+    }
+
+
+def encoders() -> list:
+    """Returns (name, compress function) pairs for every benchmarked setting."""
+    from app.compression import Compressor, compress_bytes, supported_encodings
+    from app.config import get_settings
+
+    settings = get_settings()
+
+    def on_the_fly(encoding):
+        def compress(data):
+            compressor = Compressor(
+                encoding,
+                gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+                brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            )
+            return compressor.compress(data) + compressor.finish()
+
+        return compress
+
+    result = []
+    for encoding in supported_encodings():
+        result.append((f"{encoding} (response)", on_the_fly(encoding)))
+        result.append(
+            (f"{encoding} (build)", lambda data, e=encoding: compress_bytes(data, e))
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=200, help="runs per payload")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("SECRET_KEY", "benchmark")
+        os.environ.setdefault("BASE_DIR", tmp)
+        os.environ.setdefault("TEMPLATE_CACHE_FOLDER", tmp)
+        os.environ.setdefault("STATIC_BUILD_FOLDER", str(Path(tmp) / "build"))
+        payloads = load_payloads()
+
+        print(f"{'payload':<18} {'encoder':<16} {'bytes':>8} {'saved':>7} {'µs/op':>9}")
+        for payload_name, data in payloads.items():
+            print(f"{payload_name:<18} {'identity':<16} {len(data):>8}")
+            for encoder_name, compress in encoders():
+                compressed = compress(data)
+                start = time.perf_counter()
+                for _ in range(args.runs):
+                    compress(data)
+                elapsed = (time.perf_counter() - start) / args.runs
+                saved = 1 - len(compressed) / len(data)
+                print(
+                    f"{'':<18} {encoder_name:<16} {len(compressed):>8} "
+                    f"{saved:>6.1%} {elapsed * 1e6:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+JPEG encoding benchmark for the fixed-quality and SSIM-targeted modes.
+
+Prepares every fixture like an upload (RGB, at most MAX_DIMENSION) and
+encodes it with each configuration. Reports the total size, the savings
+against the previous fixed quality=90 encoding, the mean chosen quality, the
+mean and lowest full-size luma SSIM and the encoding time including the
+quality search.
+
+Without --corpus, a synthetic corpus of flat, smooth, detailed and noisy
+scenes is used; pass a folder of real photos for representative numbers.
+
+Usage:
+    uv run python benchmarks/jpeg_encoding.py [--corpus path/to/photos]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".tif", ".tiff"}
+
+# (name, SSIM target or None for fixed quality 90, subsampling, optimize,
+#  progressive, tiles per side the quality search samples or 0 for none)
+CONFIGURATIONS = [
+    ("fixed q90 (previous)", None, "4:2:0", False, True, None),
+    ("fixed q90 baseline", None, "4:2:0", False, False, None),
+    ("fixed q90 baseline opt", None, "4:2:0", True, False, None),
+    ("ssim 0.98", 0.98, "4:2:0", True, True, 4),
+    ("ssim 0.985", 0.985, "4:2:0", True, True, 4),
+    ("ssim 0.99", 0.99, "4:2:0", True, True, 4),
+    ("ssim 0.985 full image", 0.985, "4:2:0", True, True, 0),
+    ("ssim 0.985 4:2:2", 0.985, "4:2:2", True, True, 4),
+    ("ssim 0.985 4:4:4", 0.985, "4:4:4", True, True, 4),
+]
+
+
+def synthetic_corpus() -> dict:
+    """Returns generated images covering typical kinds of scenes."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    size = (1600, 1067)
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 24)
+
+    graphic = Image.new("RGB", size, (240, 236, 228))
+    draw = ImageDraw.Draw(graphic)
+    for i in range(12):
+        draw.rectangle((80 + i * 120, 100, 160 + i * 120, 900), fill=(20 * i, 90, 160))
+        draw.line((0, 40 + i * 80, size[0], 40 + i * 80), fill=(30, 30, 30), width=3)
+
+    sky = Image.merge(
+        "RGB",
+        (
+            gradient.point(lambda v: 60 + v // 3),
+            gradient.point(lambda v: 110 + v // 3),
+            Image.blend(gradient, noise, 0.05).point(lambda v: 180 + v // 4),
+        ),
+    )
+
+    mandelbrot = Image.effect_mandelbrot(size, (-0.75, -0.2, -0.65, -0.1), 200)
+    detail = Image.merge(
+        "RGB", (mandelbrot, mandelbrot.point(lambda v: 255 - v), gradient)
+    )
+
+    blobs = Image.merge(
+        "RGB",
+        (
+            Image.effect_noise((32, 21), 80).resize(size, Image.BICUBIC),
+            Image.effect_noise((24, 16), 80).resize(size, Image.BICUBIC),
+            gradient,
+        ),
+    ).filter(ImageFilter.GaussianBlur(8))
+    portrait = Image.blend(blobs, Image.merge("RGB", (noise, noise, noise)), 0.12)
+
+    foliage = Image.merge(
+        "RGB",
+        (
+            Image.effect_noise(size, 60),
+            Image.effect_noise(size, 60).point(lambda v: min(255, v + 40)),
+            Image.effect_noise(size, 60).point(lambda v: v // 2),
+        ),
+    ).filter(ImageFilter.GaussianBlur(0.8))
+
+    return {
+        "graphic": graphic,
+        "sky": sky,
+        "detail": detail,
+        "portrait": portrait,
+        "foliage": foliage,
+    }
+
+
+def load_corpus(folder: Path) -> dict:
+    """Loads and prepares every image in a folder like an upload."""
+    from PIL import Image, ImageOps
+    from app.config import get_settings
+
+    settings = get_settings()
+    corpus = {}
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((settings.MAX_DIMENSION, settings.MAX_DIMENSION))
+            corpus[path.name] = img
+    return corpus
+
+
+def encode(
+    img, quality: int, subsampling: str, optimize: bool, progressive: bool
+) -> bytes:
+    output = io.BytesIO()
+    img.save(
+        output,
+        format="JPEG",
+        quality=quality,
+        subsampling=subsampling,
+        optimize=optimize,
+        progressive=progressive,
+    )
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, help="folder of images to encode")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per image")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    sys.path.insert(0, str(ROOT))
+    from PIL import Image
+    from app.jpeg_encoding import find_quality, ssim
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not corpus:
+        parser.error("the corpus folder contains no images")
+    print(f"{len(corpus)} image(s): {', '.join(corpus)}\n")
+
+    baseline_bytes = None
+    print(
+        f"{'configuration':<24} {'bytes':>10} {'saved':>8} "
+        f"{'quality':>8} {'ssim':>7} {'min':>7} {'ms/image':>9}"
+    )
+    for configuration in CONFIGURATIONS:
+        name, target, subsampling, optimize, progressive, tiles = configuration
+        total_bytes, qualities, scores, times = 0, [], [], []
+        for img in corpus.values():
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                quality = (
+                    find_quality(img, target, subsampling, tiles) if target else 90
+                )
+                data = encode(img, quality, subsampling, optimize, progressive)
+                times.append(time.perf_counter() - start)
+            total_bytes += len(data)
+            qualities.append(quality)
+            with Image.open(io.BytesIO(data)) as decoded:
+                scores.append(ssim(img, decoded))
+
+        baseline_bytes = baseline_bytes or total_bytes
+        print(
+            f"{name:<24} {total_bytes:>10} {1 - total_bytes / baseline_bytes:>7.1%} "
+            f"{statistics.mean(qualities):>8.1f} {statistics.mean(scores):>7.4f} "
+            f"{min(scores):>7.4f} {statistics.median(times) * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Startup benchmark for the ASGI app and each CLI command.
+
+Every target is run in a fresh interpreter with `-X importtime`, against a
+throwaway database and upload folder, so nothing touches the real data.
+Reports the median wall time and import time per target, and optionally the
+slowest top-level imports.
+
+Usage:
+    uv run python benchmarks/startup.py [--runs 5] [--top 5]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> tuple[int, dict]:
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        The total import time in microseconds, and the cumulative time of each
+        top-level import.
+    """
+    total = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        # Top-level imports are printed with a single space of indentation
+        if len(indent) == 1:
+            total += int(cumulative)
+            top_level[module] = int(cumulative)
+    return total, top_level
+
+
+def make_fixture(directory: Path) -> Path:
+    """Writes a small PNG image used by the upload-image command."""
+    from PIL import Image
+
+    path = directory / "fixture.png"
+    Image.new("RGB", (2400, 1600), (120, 80, 40)).save(path)
+    return path
+
+
+def build_targets(fixture: Path) -> list[tuple[str, list[str], str]]:
+    """Returns (name, argv, stdin) for every benchmarked entry point."""
+    cli = str(ROOT / "cli.py")
+    return [
+        ("asgi app", ["-c", "import app.main"], ""),
+        ("cli --help", [cli, "--help"], ""),
+        ("cli init", [cli, "init"], ""),
+        ("cli create-user", [cli, "create-user", "bench"], "secret\n"),
+        ("cli upload-image", [cli, "upload-image", "bench", str(fixture)], ""),
+        ("cli delete-image", [cli, "delete-image", "missing.jpg"], ""),
+        ("cli clean-images", [cli, "clean-images"], ""),
+        ("cli rebuild-archive", [cli, "rebuild-archive"], ""),
+        ("cli check-storage", [cli, "check-storage"], ""),
+        ("cli fsck", [cli, "fsck", "--verify"], ""),
+        ("cli backfill-dimensions", [cli, "backfill-dimensions"], ""),
+        ("cli export-static", [cli, "export-static", str(fixture.parent / "site")], ""),
+        ("cli build-assets", [cli, "build-assets"], ""),
+    ]
+
+
+def run_target(argv: list[str], stdin: str, env: dict) -> tuple[float, str]:
+    """Runs one target with import timing and returns its wall time and stderr."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=env,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="runs per target")
+    parser.add_argument(
+        "--top", type=int, default=0, help="show the N slowest top-level imports"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(ROOT),
+            "SECRET_KEY": "benchmark",
+            "BASE_DIR": str(tmp_path),
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'bench.db'}",
+            "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+            "UPLOAD_SESSION_FOLDER": str(tmp_path / "upload_sessions"),
+            "TEMPLATE_CACHE_FOLDER": str(tmp_path / "template_cache"),
+            "STATIC_BUILD_FOLDER": str(tmp_path / "build"),
+            "FSCK_CHECKPOINT_PATH": str(tmp_path / "fsck_checkpoint.json"),
+        }
+        fixture = make_fixture(tmp_path)
+
+        print(f"{'target':<24} {'wall ms':>10} {'import ms':>10}")
+        for name, argv, stdin in build_targets(fixture):
+            walls, imports = [], []
+            slowest = defaultdict(list)
+            for _ in range(args.runs):
+                elapsed, stderr = run_target(argv, stdin, env)
+                total, top_level = parse_importtime(stderr)
+                walls.append(elapsed * 1000)
+                imports.append(total / 1000)
+                for module, cumulative in top_level.items():
+                    slowest[module].append(cumulative / 1000)
+
+            print(
+                f"{name:<24} {statistics.median(walls):>10.1f} "
+                f"{statistics.median(imports):>10.1f}"
+            )
+            if args.top:
+                ranked = sorted(
+                    slowest.items(), key=lambda item: -statistics.median(item[1])
+                )
+                for module, times in ranked[: args.top]:
+                    print(f"    {module:<30} {statistics.median(times):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Feed latency benchmark during an upload storm.
+
+Starts the app with uvicorn against a throwaway database and upload folder,
+measures the latency of the feed and of image requests while idle, then
+again while many clients upload large images at once. Reports latency
+percentiles for both phases, the upload outcomes and the admission metrics.
+
+Usage:
+    uv run python benchmarks/upload_storm.py [--uploaders 16] [--duration 20]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_fixture(width: int, height: int) -> bytes:
+    """Returns a noisy JPEG, which is about as expensive to decode as a photo."""
+    from PIL import Image
+
+    image = Image.effect_noise((width, height), 16).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(latencies: list[float]) -> str:
+    """Formats the median, 95th percentile and maximum in milliseconds."""
+    if len(latencies) < 2:
+        return "no samples"
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return (
+        f"n={len(ordered):<5} p50={statistics.median(ordered) * 1000:7.1f} ms  "
+        f"p95={p95 * 1000:7.1f} ms  max={ordered[-1] * 1000:7.1f} ms"
+    )
+
+
+async def poll_feed(client: httpx.AsyncClient, image_url: str, stop: asyncio.Event):
+    """Requests the feed and an image in turn until stopped; returns latencies."""
+    latencies = {"feed": [], "image": []}
+    while not stop.is_set():
+        for name, url in (("feed", "/"), ("image", image_url)):
+            start = time.perf_counter()
+            response = await client.get(url)
+            response.raise_for_status()
+            latencies[name].append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def upload_loop(client: httpx.AsyncClient, fixture: bytes, stop: asyncio.Event):
+    """Uploads the fixture until stopped, without honoring Retry-After."""
+    outcomes = Counter()
+    while not stop.is_set():
+        response = await client.post(
+            "/upload", files={"file": ("storm.jpg", fixture, "image/jpeg")}
+        )
+        outcomes[response.status_code] += 1
+    return outcomes
+
+
+async def measure(base_url: str, args, fixture: bytes):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.post(
+            "/token", data={"username": "bench", "password": "secret"}
+        )
+        response.raise_for_status()
+        # The session cookie is marked secure, so pass it on explicitly over http
+        cookie = {"Cookie": response.headers["set-cookie"].split(";")[0]}
+
+        # One image, so the feed and image requests have something to serve
+        async with httpx.AsyncClient(
+            base_url=base_url, timeout=120, headers=cookie
+        ) as uploader:
+            response = await uploader.post(
+                "/upload", files={"file": ("seed.jpg", fixture, "image/jpeg")}
+            )
+            if "success" not in response.text:
+                raise RuntimeError(f"Seed upload failed: {response.text}")
+        feed = await client.get("/")
+        marker = 'src="/images/'
+        start = feed.text.index(marker) + len(marker) - len("/images/")
+        image_url = feed.text[start : feed.text.index('"', start)]
+
+        for phase, uploaders in (("idle", 0), ("storm", args.uploaders)):
+            stop = asyncio.Event()
+            upload_clients = [
+                httpx.AsyncClient(base_url=base_url, timeout=120, headers=cookie)
+                for _ in range(uploaders)
+            ]
+            poller = asyncio.create_task(poll_feed(client, image_url, stop))
+            storm = [
+                asyncio.create_task(upload_loop(upload_client, fixture, stop))
+                for upload_client in upload_clients
+            ]
+            await asyncio.sleep(args.duration)
+            stop.set()
+            latencies = await poller
+            outcomes = sum(await asyncio.gather(*storm), Counter())
+            for upload_client in upload_clients:
+                await upload_client.aclose()
+
+            print(f"{phase} ({uploaders} uploaders)")
+            print(f"  feed   {percentiles(latencies['feed'])}")
+            print(f"  image  {percentiles(latencies['image'])}")
+            if outcomes:
+                print(f"  uploads by status: {dict(sorted(outcomes.items()))}")
+
+        metrics = await client.get("/metrics")
+        print("admission metrics")
+        for line in metrics.text.splitlines():
+            if line.startswith("photolog_upload_admission_"):
+                print(f"  {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--uploaders", type=int, default=16, help="concurrent uploaders"
+    )
+    parser.add_argument("--duration", type=float, default=20, help="seconds per phase")
+    parser.add_argument("--width", type=int, default=4000, help="fixture width")
+    parser.add_argument("--height", type=int, default=3000, help="fixture height")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(ROOT),
+            "SECRET_KEY": "benchmark",
+            "BASE_DIR": str(tmp_path),
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'bench.db'}",
+            "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+            "UPLOAD_SESSION_FOLDER": str(tmp_path / "upload_sessions"),
+            "TEMPLATE_CACHE_FOLDER": str(tmp_path / "template_cache"),
+            "MAX_UPLOADS_PER_DAY": "1000000",
+            "METRICS_ENABLED": "true",
+        }
+        subprocess.run(
+            [sys.executable, str(ROOT / "cli.py"), "init"],
+            cwd=ROOT,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [sys.executable, str(ROOT / "cli.py"), "create-user", "bench"],
+            input="secret\n",
+            text=True,
+            cwd=ROOT,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        fixture = make_fixture(args.width, args.height)
+
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ],
+            cwd=ROOT,
+            env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base_url}/metrics")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            asyncio.run(measure(base_url, args, fixture))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,14 @@
-import io
-import asyncio
 import typer
-from sqlmodel import select
 from pathlib import Path
-from fastapi import HTTPException, UploadFile
-from app.database import get_session, init_db
-from app.models import User, Image
-from app.security import hash_password
-from app.config import get_settings
-from app.image_processing import process_and_save_image
 
+# Heavy modules (FastAPI, SQLModel, Pillow, passlib) are imported inside the
+# commands that need them, so each command only pays for what it uses.
 app = typer.Typer()
-settings = get_settings()
-
-
-class CustomUploadFile(UploadFile):
-    def __init__(self, filename: str, content_type: str, file: io.BytesIO):
-        super().__init__(filename=filename, file=file)
-        self.content_type = content_type
 
 
 def get_db_session():
+    from app.database import get_session
+
     with next(get_session()) as session:
         yield session
 
@@ -30,6 +18,8 @@ def init():
     """
     Initialize the database and create tables.
     """
+    from app.database import init_db
+
     init_db()
     typer.echo("Database initialized.")
 
@@ -39,6 +29,10 @@ def create_user(username: str):
     """
     Create a new user with the specified username. Prompts for password securely.
     """
+    from sqlmodel import select
+    from app.models import User
+    from app.security import hash_password
+
     session = next(get_db_session())
     existing_user = session.exec(select(User).where(User.username == username)).first()
     if existing_user:
@@ -63,6 +57,14 @@ def upload_image(username: str, file_path: str):
         username: The username of the user uploading the image.
         file_path: The path to the image file to upload.
     """
+    import io
+    import asyncio
+    from sqlmodel import select
+    from fastapi import HTTPException, UploadFile
+    from app.models import User, Image
+    from app.image_processing import process_and_save_image
+    from app.archive import record_upload
+
     session = next(get_db_session())
     user = session.exec(select(User).where(User.username == username)).first()
     if not user:
@@ -93,15 +95,20 @@ def upload_image(username: str, file_path: str):
 
     try:
         # Run the async process_and_save_image function with the content_type
-        filename = asyncio.run(
+        stored = asyncio.run(
             process_and_save_image(file, user_id=user.id, content_type=content_type)
         )
 
         # Save image metadata to the database
         image = Image(
-            filename=filename, original_filename=file_path.name, user_id=user.id
+            filename=stored.filename,
+            original_filename=file_path.name,
+            user_id=user.id,
+            width=stored.width,
+            height=stored.height,
         )
         session.add(image)
+        record_upload(session, image)
         session.commit()
 
         typer.echo(
@@ -119,16 +126,20 @@ def delete_image(filename: str):
     """
     Delete an image by its filename.
     """
+    from sqlmodel import select
+    from app.models import Image
+    from app.archive import record_delete
+    from app.storage import get_storage
+
     session = next(get_db_session())
     image = session.exec(select(Image).where(Image.filename == filename)).first()
     if not image:
         typer.echo("Image not found.")
         return
 
-    file_path = settings.UPLOAD_FOLDER / image.filename
-    if file_path.exists():
-        file_path.unlink()
+    get_storage().delete(image.filename)
 
+    record_delete(session, image)
     session.delete(image)
     session.commit()
     typer.echo(f"Image '{filename}' deleted successfully.")
@@ -139,18 +150,166 @@ def clean_images():
     """
     Delete all images from the database and remove image files from storage.
     """
+    from sqlmodel import select
+    from app.models import Image
+    from app.archive import clear_archive
+    from app.storage import get_storage
+
+    storage = get_storage()
     session = next(get_db_session())
     images = session.exec(select(Image)).all()
 
     for image in images:
-        file_path = settings.UPLOAD_FOLDER / image.filename
-        if file_path.exists():
-            file_path.unlink()
+        storage.delete(image.filename)
         session.delete(image)
 
+    clear_archive(session)
     session.commit()
     typer.echo("All images deleted from database and storage.")
 
 
+@app.command()
+def rebuild_archive():
+    """
+    Recompute the monthly archive rollup from all stored images.
+    """
+    from app.archive import rebuild_archive as rebuild
+
+    session = next(get_db_session())
+    months = rebuild(session)
+    typer.echo(f"Archive rebuilt with {months} month(s).")
+
+
+@app.command()
+def check_storage():
+    """
+    Check the configured storage backend by storing, reading and deleting a probe file.
+    """
+    from app.config import get_settings
+    from app.storage import check_storage as check, get_storage
+
+    problems = check(get_storage())
+    backend = get_settings().STORAGE_BACKEND
+    if not problems:
+        typer.echo(f"Storage backend '{backend}' passed all checks.")
+        return
+
+    typer.echo(f"Storage backend '{backend}' failed {len(problems)} check(s):")
+    for problem in problems:
+        typer.echo(f"  {problem}")
+    raise typer.Exit(code=1)
+
+
+@app.command()
+def backfill_dimensions():
+    """
+    Store the width and height of images uploaded before they were recorded.
+    """
+    from app.image_processing import backfill_dimensions as backfill
+
+    session = next(get_db_session())
+    updated, failed = backfill(session)
+    typer.echo(f"Stored dimensions of {updated} image(s); {failed} could not be read.")
+
+
+@app.command()
+def fsck(
+    verify: bool = typer.Option(False, help="Decode images to find corrupt files."),
+    workers: int = typer.Option(
+        None, help="Verifying processes; defaults to the CPU count."
+    ),
+    quarantine: bool = typer.Option(
+        False, help="Move orphan and corrupt files to the quarantine folder."
+    ),
+    repair: bool = typer.Option(
+        False, help="Delete rows whose file is missing or corrupt."
+    ),
+    full: bool = typer.Option(
+        False, help="Verify all images, ignoring the checkpoint."
+    ),
+):
+    """
+    Check that stored image files and database rows match.
+    Exits with status 1 if problems remain, e.g. for nightly cron jobs.
+
+    Args:
+        verify: Decode images to find corrupt files.
+        workers: Number of verifying processes.
+        quarantine: Move orphan and corrupt files to the quarantine folder.
+        repair: Delete rows whose file is missing or corrupt.
+        full: Verify all images, ignoring the checkpoint.
+    """
+    from app.fsck import check_consistency
+
+    session = next(get_db_session())
+    report = check_consistency(
+        session,
+        verify=verify,
+        workers=workers,
+        quarantine=quarantine,
+        repair=repair,
+        full=full,
+    )
+
+    typer.echo(
+        f"Checked {report.images_checked} image row(s) and {report.files_scanned} file(s)"
+        + (f", verified {report.files_verified} file(s)." if verify else ".")
+    )
+    for name in report.orphans:
+        typer.echo(f"Orphan file: {name}")
+    for name in report.dangling:
+        typer.echo(f"Missing file: {name}")
+    for name, error in report.corrupt:
+        typer.echo(f"Corrupt file: {name} ({error})")
+    if quarantine:
+        typer.echo(f"Quarantined {report.quarantined} file(s).")
+    if repair:
+        typer.echo(f"Deleted {report.rows_deleted} image row(s).")
+
+    unresolved = (0 if quarantine else len(report.orphans)) + (
+        0 if repair else len(report.dangling) + len(report.corrupt)
+    )
+    if unresolved:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def export_static(
+    output_dir: Path,
+    force: bool = typer.Option(False, help="Rewrite all pages, even if unchanged."),
+):
+    """
+    Export the feed and archive as static files for serving without the app.
+    Re-runs only rewrite pages whose images changed.
+
+    Args:
+        output_dir: Directory to write the static site into.
+        force: Rewrite all pages, even if unchanged.
+    """
+    from app.static_export import export_static as export
+
+    session = next(get_db_session())
+    stats = export(session, output_dir, force=force)
+    typer.echo(
+        f"Exported to '{output_dir}': {stats.pages_written} page(s) written, "
+        f"{stats.pages_unchanged} unchanged, {stats.pages_removed} removed; "
+        f"{stats.images_added} image(s) added, {stats.images_removed} removed."
+    )
+
+
+@app.command()
+def build_assets():
+    """
+    Build fingerprinted and pre-compressed static assets for production.
+    """
+    from app.assets import build_assets as build
+    from app.config import get_settings
+
+    manifest = build()
+    typer.echo(
+        f"Built {len(manifest)} asset(s) into '{get_settings().STATIC_BUILD_FOLDER}'."
+    )
+
+
 if __name__ == "__main__":
     app()